@@ -11,7 +11,8 @@ import sys
 import time
 import traceback
 import gc
-from pathlib import Path
+import functools
+from operator import itemgetter
 from script_base import ScriptBase, create_simple_script
 
 
@@ -22,7 +23,13 @@ class PerformanceConfig:
     PROGRESS_INTERVAL = 2000  # 减少进度报告频率
     MEMORY_CHECK_INTERVAL = 5000  # 减少内存检查频率
     MAX_PATH_LENGTH = 280
-    BATCH_SIZE = 1000  # 批处理大小
+
+
+# 路径分隔符（文件名提取热路径使用）
+_SEP = os.sep
+
+# 不符合规范文件元组的字段顺序
+NON_COMPLIANT_FIELDS = ('path', 'name', 'full_name')
 
 
 # ==================== 性能优化：预编译跳过模式 ====================
@@ -60,20 +67,33 @@ class SkipPatterns:
                 filename.endswith(('.tmp', '.bak', '.log')))
 
 
+# ==================== 性能优化：正则编译缓存 ====================
+@functools.lru_cache(maxsize=64)
+def _compile(pattern, flags):
+    """缓存编译后的正则，worker进程内重复调用时复用"""
+    return re.compile(pattern, flags)
+
+
 # ==================== 性能优化：快速扩展名解析 ====================
 def fast_parse_extensions(extensions):
     """快速解析文件后缀"""
     if not extensions:
         return None
 
-    # 使用集合，提供O(1)查找性能
-    result = set()
-
     if isinstance(extensions, str):
         # 优化字符串分割
-        exts = extensions.replace(',', ' ').split()
+        exts = tuple(extensions.replace(',', ' ').split())
     else:
-        exts = extensions if isinstance(extensions, (list, tuple)) else [extensions]
+        exts = tuple(extensions) if isinstance(extensions, (list, tuple)) else (extensions,)
+
+    return _parse_extensions_cached(exts)
+
+
+@functools.lru_cache(maxsize=None)
+def _parse_extensions_cached(exts):
+    """按后缀元组缓存解析结果（返回frozenset，避免共享结果被修改）"""
+    # 使用集合，提供O(1)查找性能
+    result = set()
 
     for ext in exts:
         ext = str(ext).strip().lower()
@@ -81,62 +101,60 @@ def fast_parse_extensions(extensions):
             # 标准化扩展名格式
             result.add(ext if ext.startswith('.') else '.' + ext)
 
-    return result if result else None
+    return frozenset(result) if result else None
 
 
 # ==================== 性能优化：高速文件扫描 ====================
 def fast_scan_files(directory, target_extensions, script):
-    """高速文件扫描 - 使用pathlib和优化算法"""
+    """高速文件扫描 - 基于os.scandir的迭代遍历（不跟随符号链接）"""
 
     skip_patterns = SkipPatterns()
     matched_files = []
     total_files = 0
     skipped_files = 0
+    max_path_length = PerformanceConfig.MAX_PATH_LENGTH
+    # 扩展名已在解析时统一小写
+    ext_tuple = tuple(target_extensions) if target_extensions else None
 
     script.info(f"开始高速扫描目录: {directory}")
     start_time = time.time()
 
     try:
-        # 使用pathlib，性能更好
-        root_path = Path(directory)
-        if not root_path.is_dir():
+        if not os.path.isdir(directory):
             raise ValueError(f"目录不存在或不可访问: {directory}")
 
-        # 获取根目录深度（pathlib版本）
-        root_depth = len(root_path.parts)
+        # 显式栈代替递归，(目录路径, 相对深度)；DirEntry自带类型信息，避免额外stat
+        stack = [(directory, 0)]
+        limit_reached = False
 
-        # 使用iterdir()而不是os.walk()，在某些情况下更快
-        def scan_directory(current_path, current_depth):
-            nonlocal total_files, skipped_files, matched_files
+        while stack and not limit_reached:
+            current_path, depth = stack.pop()
 
             try:
-                # 深度检查
-                if current_depth - root_depth > PerformanceConfig.MAX_DEPTH:
-                    return
-
                 # 路径长度检查
-                if len(str(current_path)) > PerformanceConfig.MAX_PATH_LENGTH:
-                    return
+                if len(current_path) > max_path_length:
+                    continue
 
                 # 获取目录内容，一次性读取
                 try:
-                    items = list(current_path.iterdir())
-                except (PermissionError, OSError):
-                    return
+                    with os.scandir(current_path) as it:
+                        entries = list(it)
+                except OSError:
+                    continue
 
-                # 分离文件和目录
-                files = []
-                dirs = []
+                sub_dirs = []
 
-                for item in items:
-                    if item.is_file():
-                        files.append(item)
-                    elif item.is_dir():
-                        dirs.append(item)
+                for entry in entries:
+                    filename = entry.name
 
-                # 批量处理文件
-                for file_path in files:
-                    filename = file_path.name
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            sub_dirs.append(entry)
+                            continue
+                        if not entry.is_file():
+                            continue
+                    except OSError:
+                        continue
 
                     # 快速跳过检查
                     if skip_patterns.should_skip_file(filename):
@@ -146,55 +164,49 @@ def fast_scan_files(directory, target_extensions, script):
                     if len(filename) > 200:
                         continue
 
-                    # 扩展名检查（优化版本）
-                    if target_extensions:
-                        file_suffix = file_path.suffix.lower()
-                        if file_suffix not in target_extensions:
-                            skipped_files += 1
-                            continue
+                    # 扩展名检查（str.endswith接受元组，一次C调用完成匹配）
+                    if ext_tuple and not filename.lower().endswith(ext_tuple):
+                        skipped_files += 1
+                        continue
 
                     # 路径长度检查
-                    if len(str(file_path)) > PerformanceConfig.MAX_PATH_LENGTH:
+                    file_path = entry.path
+                    if len(file_path) > max_path_length:
                         continue
 
-                    matched_files.append(str(file_path))
+                    matched_files.append(file_path)
                     total_files += 1
 
                     # 文件数量限制
                     if total_files >= PerformanceConfig.MAX_FILES:
-                        raise StopIteration("文件数量限制")
+                        limit_reached = True
+                        break
+
+                if limit_reached:
+                    script.info("达到文件数量限制，停止扫描")
+                    break
 
                 # 进度报告（减少频率）
-                if total_files % PerformanceConfig.PROGRESS_INTERVAL == 0:
-                    script.info(f"已扫描 {total_files} 个文件，深度: {current_depth - root_depth}")
+                if total_files and total_files % PerformanceConfig.PROGRESS_INTERVAL == 0:
+                    script.info(f"已扫描 {total_files} 个文件，深度: {depth}")
 
                 # 内存管理（减少频率）
-                if total_files % PerformanceConfig.MEMORY_CHECK_INTERVAL == 0:
+                if total_files and total_files % PerformanceConfig.MEMORY_CHECK_INTERVAL == 0:
                     gc.collect()
 
-                # 递归处理子目录
-                for dir_path in dirs:
-                    dirname = dir_path.name
-
-                    # 快速跳过检查
-                    if skip_patterns.should_skip_dir(dirname):
-                        continue
+                # 深度检查：超过最大深度的子目录不再入栈
+                if depth >= PerformanceConfig.MAX_DEPTH:
+                    continue
 
-                    # 路径长度检查
-                    if len(str(dir_path)) > PerformanceConfig.MAX_PATH_LENGTH:
+                # 逆序入栈，保持与递归遍历相同的访问顺序
+                for entry in reversed(sub_dirs):
+                    if skip_patterns.should_skip_dir(entry.name):
                         continue
-
-                    # 递归扫描
-                    scan_directory(dir_path, current_depth + 1)
+                    stack.append((entry.path, depth + 1))
 
             except Exception as e:
                 script.warning(f"扫描目录异常 {current_path}: {e}")
 
-        # 开始扫描
-        scan_directory(root_path, root_depth)
-
-    except StopIteration:
-        script.info("达到文件数量限制，停止扫描")
     except Exception as e:
         script.error(f"文件扫描异常: {e}")
         raise
@@ -207,7 +219,7 @@ def fast_scan_files(directory, target_extensions, script):
 
 # ==================== 性能优化：批量正则检查 ====================
 def fast_regex_check(files, regex_pattern, case_sensitive, check_full_name, script):
-    """批量正则检查 - 使用批处理优化"""
+    """批量正则检查 - 单次遍历文件列表"""
 
     script.info(f"开始高速正则检查 {len(files)} 个文件...")
     start_time = time.time()
@@ -218,76 +230,60 @@ def fast_regex_check(files, regex_pattern, case_sensitive, check_full_name, scri
             raise ValueError("正则表达式过长")
 
         flags = 0 if case_sensitive else re.IGNORECASE
-        compiled_pattern = re.compile(regex_pattern, flags)
+        compiled_pattern = _compile(regex_pattern, flags)
         script.info(f"正则表达式编译成功")
     except re.error as e:
         raise ValueError(f"正则表达式无效: {e}")
 
-    # 结果容器
+    # 结果容器（不符合规范的文件以 (path, name, full_name) 元组保存，输出时再转换为字典）
     compliant_paths = []
     non_compliant_info = []
     error_info = []
+    cp_append = compliant_paths.append
+    ncp_append = non_compliant_info.append
+    err_append = error_info.append
 
-    # 批量处理优化
     total_files = len(files)
-    processed = 0
+    progress_interval = PerformanceConfig.PROGRESS_INTERVAL
 
-    for batch_start in range(0, total_files, PerformanceConfig.BATCH_SIZE):
-        batch_end = min(batch_start + PerformanceConfig.BATCH_SIZE, total_files)
-        batch_files = files[batch_start:batch_end]
+    for i, file_path in enumerate(files, 1):
+        try:
+            # 基础验证（优化版本）
+            if not isinstance(file_path, str) or len(file_path) > PerformanceConfig.MAX_PATH_LENGTH:
+                continue
 
-        # 批量处理文件
-        for file_path in batch_files:
-            try:
-                # 基础验证（优化版本）
-                if not isinstance(file_path, str) or len(file_path) > PerformanceConfig.MAX_PATH_LENGTH:
-                    continue
+            # 文件名提取（rfind未找到时返回-1，切片从0开始，无需分支）
+            basename = file_path[file_path.rfind(_SEP) + 1:]
 
-                # 文件名提取（优化）
-                if os.sep in file_path:
-                    basename = file_path.split(os.sep)[-1]  # 比os.path.basename更快
-                else:
-                    basename = file_path
-
-                # 检查名称确定
-                if check_full_name:
-                    check_name = basename
-                else:
-                    # 优化的扩展名移除
-                    dot_pos = basename.rfind('.')
-                    check_name = basename[:dot_pos] if dot_pos != -1 else basename
-
-                # 文件名长度检查
-                if len(check_name) > 80:
-                    continue
+            # 检查名称确定
+            if check_full_name:
+                check_name = basename
+            else:
+                # 优化的扩展名移除
+                dot_pos = basename.rfind('.')
+                check_name = basename[:dot_pos] if dot_pos != -1 else basename
+
+            # 文件名长度检查
+            if len(check_name) > 80:
+                continue
+
+            # 正则匹配
+            if compiled_pattern.match(check_name):
+                cp_append(file_path)
+            else:
+                ncp_append((file_path, check_name, basename))
+
+        except Exception as fe:
+            err_append({
+                'path': str(file_path)[:100],
+                'name': 'ERROR',
+                'error': str(fe)[:100]
+            })
 
-                # 正则匹配
-                if compiled_pattern.match(check_name):
-                    compliant_paths.append(file_path)
-                else:
-                    non_compliant_info.append({
-                        'path': file_path,
-                        'name': check_name,
-                        'full_name': basename
-                    })
-
-                processed += 1
-
-            except Exception as fe:
-                error_info.append({
-                    'path': str(file_path)[:100],
-                    'name': 'ERROR',
-                    'error': str(fe)[:100]
-                })
-                processed += 1
-
-        # 批次完成后的进度报告
-        if batch_end % PerformanceConfig.PROGRESS_INTERVAL < PerformanceConfig.BATCH_SIZE:
-            script.info(f"已检查 {batch_end}/{total_files} 个文件 ({(batch_end / total_files * 100):.1f}%)")
-
-        # 批次间内存管理
-        if batch_end % PerformanceConfig.MEMORY_CHECK_INTERVAL < PerformanceConfig.BATCH_SIZE:
-            gc.collect()
+        finally:
+            # 进度报告
+            if i % progress_interval == 0:
+                script.info(f"已检查 {i}/{total_files} 个文件 ({(i / total_files * 100):.1f}%)")
 
     check_time = time.time() - start_time
     script.info(f"高速正则检查完成: 耗时 {check_time:.2f}秒")
@@ -338,12 +334,11 @@ def format_chinese_ascii_message(compliant_count, non_compliant_info, error_info
         message_parts.append("   " + "-" * 76)
 
         # 按文件名排序，便于查看
-        sorted_non_compliant = sorted(non_compliant_info, key=lambda x: x['full_name'])
+        sorted_non_compliant = sorted(non_compliant_info, key=itemgetter(2))
 
-        for i, info in enumerate(sorted_non_compliant, 1):
+        for i, (_, _, filename) in enumerate(sorted_non_compliant, 1):
             # 格式化序号和文件名
             prefix = f"   {i:>3}."
-            filename = info['full_name']
 
             # 如果文件名太长，适当截断并添加省略号
             if len(filename) > 60:
@@ -365,10 +360,7 @@ def format_chinese_ascii_message(compliant_count, non_compliant_info, error_info
             error_filename = "未知文件"
             if 'path' in info:
                 try:
-                    if os.sep in info['path']:
-                        error_filename = info['path'].split(os.sep)[-1]
-                    else:
-                        error_filename = info['path']
+                    error_filename = info['path'][info['path'].rfind(_SEP) + 1:]
                 except:
                     error_filename = str(info['path'])[:50]
 
@@ -410,112 +402,6 @@ def format_chinese_ascii_message(compliant_count, non_compliant_info, error_info
     return "\n".join(message_parts)
 
 
-# ==================== 输出优化函数 (中文ASCII版本) ====================
-def print_detailed_results_chinese_ascii(script, compliant_count, non_compliant_info, error_info, total_time,
-                                         regex_pattern):
-    """分段打印详细结果，使用中文和ASCII字符"""
-
-    total_checked = compliant_count + len(non_compliant_info) + len(error_info)
-    compliance_rate = (compliant_count / total_checked * 100) if total_checked > 0 else 0
-
-    # 打印概览信息
-    script.info("=" * 80)
-    script.info("                         文件名规范检查结果报告")
-    script.info("=" * 80)
-
-    script.info("[检查概览] 统计信息:")
-    script.info(f"   +-- 总计检查文件: {total_checked} 个")
-    script.info(f"   +-- 符合规范文件: {compliant_count} 个")
-    script.info(f"   +-- 不符合规范文件: {len(non_compliant_info)} 个")
-    script.info(f"   +-- 检查异常文件: {len(error_info)} 个")
-    script.info(f"   +-- 符合率: {compliance_rate:.1f}%")
-    script.info(f"   +-- 执行耗时: {total_time:.2f} 秒")
-
-    script.info(f"\n[正则规则] 使用的表达式:")
-    script.info(f"   {regex_pattern}")
-
-    # 打印结果判定
-    total_issues = len(non_compliant_info) + len(error_info)
-    if total_issues == 0:
-        script.info("\n[检查结果] 状态: 通过")
-        script.info("   所有文件都符合命名规范!")
-    else:
-        script.info("\n[检查结果] 状态: 未通过")
-        script.info(f"   发现 {total_issues} 个问题文件需要处理")
-
-    # 分批打印不符合规范的文件
-    if non_compliant_info:
-        script.info(f"\n[不符合规范] 文件列表 (共 {len(non_compliant_info)} 个):")
-        script.info("   " + "-" * 76)
-
-        # 按文件名排序
-        sorted_non_compliant = sorted(non_compliant_info, key=lambda x: x['full_name'])
-
-        # 分批显示，每批20个
-        batch_size = 20
-        for batch_start in range(0, len(sorted_non_compliant), batch_size):
-            batch_end = min(batch_start + batch_size, len(sorted_non_compliant))
-            batch = sorted_non_compliant[batch_start:batch_end]
-
-            for i, info in enumerate(batch, batch_start + 1):
-                filename = info['full_name']
-                if len(filename) > 60:
-                    display_name = filename[:57] + "..."
-                else:
-                    display_name = filename
-
-                script.info(f"   {i:>3}. {display_name}")
-
-        script.info("   " + "-" * 76)
-
-    # 分批打印异常文件
-    if error_info:
-        script.info(f"\n[检查异常] 文件列表 (共 {len(error_info)} 个):")
-        script.info("   " + "-" * 76)
-
-        for i, info in enumerate(error_info, 1):
-            error_filename = "未知文件"
-            if 'path' in info:
-                try:
-                    if os.sep in info['path']:
-                        error_filename = info['path'].split(os.sep)[-1]
-                    else:
-                        error_filename = info['path']
-                except:
-                    error_filename = str(info['path'])[:50]
-
-            error_reason = info.get('error', '未知错误')
-            if len(error_reason) > 40:
-                error_reason = error_reason[:37] + "..."
-
-            script.info(f"   {i:>3}. {error_filename}")
-            script.info(f"        错误: {error_reason}")
-
-        script.info("   " + "-" * 76)
-
-    # 打印建议
-    script.info("\n[处理建议] 操作指南:")
-    if non_compliant_info:
-        script.info("   +-- 根据正则表达式规则重命名不符合规范的文件")
-        script.info("   +-- 建议优先处理使用频率较高的核心文件")
-    if error_info:
-        script.info("   +-- 检查异常文件的访问权限和文件完整性")
-    if total_issues == 0:
-        script.info("   +-- 文件命名规范良好，请继续保持")
-    else:
-        script.info("   +-- 建议建立文件命名规范文档，避免类似问题")
-
-    # 打印性能统计
-    files_per_second = total_checked / total_time if total_time > 0 else 0
-    avg_time_per_file = (total_time / total_checked * 1000) if total_checked > 0 else 0
-
-    script.info(f"\n[性能统计] 执行效率:")
-    script.info(f"   +-- 处理速度: {files_per_second:.0f} 文件/秒")
-    script.info(f"   +-- 平均每文件: {avg_time_per_file:.2f} 毫秒")
-
-    script.info("\n" + "=" * 80)
-
-
 # ==================== 高性能主逻辑 ====================
 def main_logic(script: ScriptBase):
     """高性能主逻辑"""
@@ -568,14 +454,13 @@ def main_logic(script: ScriptBase):
         total_checked = compliant_count + len(non_compliant_info) + len(error_info)
         compliance_rate = (compliant_count / total_checked * 100) if total_checked > 0 else 0
 
-        # 使用中文ASCII版本的分段打印
-        print_detailed_results_chinese_ascii(script, compliant_count, non_compliant_info, error_info, total_time,
-                                             regex_pattern)
-
-        # 生成中文ASCII格式的消息（用于返回结果）
+        # 生成中文ASCII格式的消息（用于日志和返回结果）
         message = format_chinese_ascii_message(compliant_count, non_compliant_info, error_info, total_time,
                                                regex_pattern)
 
+        # 一次性输出完整报告，避免逐行调用日志
+        script.info(message)
+
         result_data = {
             'statistics': {
                 'total_checked': total_checked,
@@ -586,7 +471,7 @@ def main_logic(script: ScriptBase):
                 'execution_time': round(total_time, 3)
             },
             'regex_pattern': regex_pattern,
-            'non_compliant_files': non_compliant_info,
+            'non_compliant_files': [dict(zip(NON_COMPLIANT_FIELDS, info)) for info in non_compliant_info],
             'error_files': error_info
         }
 
@@ -9,13 +9,143 @@
 
 import os
 import re
+import sys
+import stat
+import codecs
 import datetime
-from typing import Dict, Any, List, Tuple, Optional
+import functools
+import itertools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, Any, List, Tuple, Optional, NamedTuple, FrozenSet, Iterator
 from script_base import create_simple_script
 
 
 # ==================== 辅助函数区域 ====================
 
+# 时间字符串格式 "%Y-%m-%d %H:%M:%S"，预编译后直接构造datetime，避免strptime的格式解析开销
+_DATETIME_MATCH = re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2}) (\d{1,2}):(\d{1,2}):(\d{1,2})').fullmatch
+
+# 一天差一秒（23:59:59），持续时间余数等于该值时按整天处理
+_ALMOST_FULL_DAY_SECONDS = 24 * 3600 - 1
+
+# Int32最大时间戳 (2038年1月19日 03:14:07 UTC)
+INT32_MAX_TIMESTAMP = 2147483647
+
+# 默认查找的配置文件名
+_DEFAULT_FILE_NAMES = ('TIMER_MAIN.data', 'TIMER_MAIN.data.txt', 'timer_main.data', 'timer_main.data.txt')
+
+# 推荐的文件编码（参数校验时做集合查找）
+_RECOMMENDED_ENCODINGS = frozenset({'UTF-16', 'UTF-8', 'GBK', 'ASCII'})
+
+# 按目录记录上一次成功解码所用的编码（同一目录下的文件通常编码一致，优先尝试）
+_LAST_SUCCESS_ENCODING: Dict[str, str] = {}
+
+# 严格校验的编解码器：能解码成功基本就说明编码正确，可以排在首选编码之前尝试。
+# gbk、utf-16 等编码几乎能“解码”任意字节，排到前面会把其他编码的文件解成乱码
+_STRICT_CODECS = frozenset({'utf-8', 'utf-8-sig'})
+
+
+@functools.lru_cache(maxsize=8192)
+def parse_datetime(value: str) -> datetime.datetime:
+    """
+    解析 "%Y-%m-%d %H:%M:%S" 格式的时间字符串（结果按字符串缓存，活动间大量重复的时间只解析一次）
+
+    Args:
+        value: 时间字符串
+
+    Returns:
+        datetime.datetime: 解析结果
+
+    Raises:
+        ValueError: 格式不匹配或日期非法
+    """
+    # 快速路径：标准定长格式 "YYYY-MM-DD HH:MM:SS" 交给C实现的fromisoformat
+    # 先校验长度和分隔符，避免fromisoformat放宽接受的写法（T分隔、时区、小数秒等）
+    if (len(value) == 19 and value[4] == '-' and value[7] == '-' and value[10] == ' '
+            and value[13] == ':' and value[16] == ':'):
+        try:
+            return datetime.datetime.fromisoformat(value)
+        except ValueError:
+            pass
+
+    # 非定长写法（如单位数月份）或非法值交给正则处理并给出错误信息
+    m = _DATETIME_MATCH(value)
+    if not m:
+        raise ValueError(f"time data {value!r} does not match format '%Y-%m-%d %H:%M:%S'")
+    return datetime.datetime(*map(int, m.groups()))
+
+
+@functools.lru_cache(maxsize=8192)
+def parse_timestamp(value: str) -> float:
+    """
+    将时间字符串转换为本地时间戳（按字符串缓存，同一时间只做一次解析和本地时区换算）
+
+    Args:
+        value: 时间字符串
+
+    Returns:
+        float: 时间戳（秒）
+
+    Raises:
+        ValueError: 格式不匹配或日期非法
+        OSError: 时间戳转换错误
+    """
+    return parse_datetime(value).timestamp()
+
+
+@functools.lru_cache(maxsize=None)
+def scan_directory_entries(directory: str) -> Tuple[os.DirEntry, ...]:
+    """
+    读取目录项并缓存（脚本每次运行为独立进程，运行期间目录内容视为不变）
+
+    Args:
+        directory: 目录路径
+
+    Returns:
+        Tuple[os.DirEntry, ...]: 目录项，DirEntry自带文件类型信息，无需额外stat
+
+    Raises:
+        OSError: 目录无法读取
+    """
+    with os.scandir(directory) as it:
+        return tuple(it)
+
+
+class InvalidTimeActivity(NamedTuple):
+    """时间配置无效的活动记录（输出结果时再转换为字典）"""
+    file_path: str
+    id: str
+    name: str
+    open_time: str
+    end_time: str
+
+
+class Int32RiskActivity(NamedTuple):
+    """存在Int32时间戳风险的活动记录（输出结果时再转换为字典）"""
+    file_path: str
+    id: str
+    name: str
+    open_time: str
+    end_time: str
+    open_exceeds: bool
+    end_exceeds: bool
+
+
+class AbnormalActivity(NamedTuple):
+    """持续时间异常的活动记录（比字典更省内存，输出结果时再转换为字典）"""
+    file_path: str
+    id: str
+    name: str
+    open_time: str
+    end_time: str
+    duration_days: int
+    duration_hours: int
+    duration_minutes: int
+    duration_text: str
+    total_duration_hours: float
+
+
 def find_target_files(script, directory: str, file_names: List[str], recursive: bool) -> List[str]:
     """
     在指定目录中查找目标文件名，支持是否递归
@@ -23,35 +153,44 @@ def find_target_files(script, directory: str, file_names: List[str], recursive:
     Args:
         script: ScriptBase实例
         directory: 搜索目录
-        file_names: 文件名列表
+        file_names: 文件名列表（已由 get_and_validate_parameters 去除空白和空项）
         recursive: 是否递归
 
     Returns:
         List[str]: 找到的文件路径列表
     """
-    normalized = {str(n).strip() for n in (file_names or []) if str(n).strip()}
-    if not normalized:
-        normalized = {
-            'TIMER_MAIN.data',
-            'TIMER_MAIN.data.txt',
-            'timer_main.data',
-            'timer_main.data.txt'
-        }
+    normalized = frozenset(file_names or _DEFAULT_FILE_NAMES)
 
     matched: List[str] = []
     script.debug(f"在目录 {directory} 中搜索文件: {sorted(list(normalized))} (递归: {recursive})")
 
     try:
         if recursive:
-            for root, _, files in os.walk(directory):
-                for fname in files:
-                    if fname in normalized:
-                        matched.append(os.path.join(root, fname))
+            # 显式栈遍历，与os.walk一致：自上而下、不进入符号链接目录、忽略无法读取的子目录
+            stack = [directory]
+            while stack:
+                current = stack.pop()
+                try:
+                    entries = scan_directory_entries(current)
+                except OSError:
+                    continue
+
+                sub_dirs = []
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    if is_dir:
+                        if not entry.is_symlink():
+                            sub_dirs.append(entry.path)
+                    elif entry.name in normalized:
+                        matched.append(entry.path)
+                stack.extend(reversed(sub_dirs))
         else:
-            for fname in os.listdir(directory):
-                path = os.path.join(directory, fname)
-                if os.path.isfile(path) and fname in normalized:
-                    matched.append(path)
+            for entry in scan_directory_entries(directory):
+                if entry.name in normalized and entry.is_file():
+                    matched.append(entry.path)
     except Exception as e:
         script.error(f"搜索文件时发生错误: {e}")
 
@@ -61,7 +200,68 @@ def find_target_files(script, directory: str, file_names: List[str], recursive:
     return matched
 
 
-def read_file_with_encoding(script, file_path: str, preferred_encoding: str) -> Tuple[str, str]:
+def detect_bom_encoding(raw: bytes) -> Optional[str]:
+    """
+    根据文件开头的BOM判断编码，只检查前几个字节
+
+    Args:
+        raw: 文件内容（至少包含开头4个字节）
+
+    Returns:
+        Optional[str]: BOM对应的编码，无BOM返回None
+    """
+    head = raw[:4]
+    if head.startswith((b'\xff\xfe', b'\xfe\xff')):
+        return 'utf-16'
+    if head.startswith(b'\xef\xbb\xbf'):
+        return 'utf-8-sig'
+    return None
+
+
+def read_file_bytes(file_path: str) -> bytes:
+    """
+    一次性读取文件的原始字节（不解码、不输出日志，可在后台线程中调用）
+
+    Args:
+        file_path: 文件路径
+
+    Returns:
+        bytes: 文件内容
+    """
+    with open(file_path, 'rb', buffering=1 << 20) as f:
+        return f.read()
+
+
+def prefetch_file_bytes(file_paths: List[str], max_workers: int = 4) -> Iterator[Tuple[str, Future]]:
+    """
+    按原顺序产出 (文件路径, 读取任务)，后台线程提前读取后续文件
+
+    读取属于I/O操作会释放GIL，可与当前文件的解析重叠；解码和解析仍在主线程按顺序进行，
+    日志顺序与结果不受影响。同时最多预读 max_workers 个文件，避免所有文件内容同时驻留内存。
+
+    Args:
+        file_paths: 文件路径列表
+        max_workers: 预读线程数
+
+    Returns:
+        Iterator[Tuple[str, Future]]: 文件路径及其读取任务，调用 result() 获取字节内容
+    """
+    paths = iter(file_paths)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque(
+            (path, executor.submit(read_file_bytes, path))
+            for path in itertools.islice(paths, max_workers)
+        )
+        while pending:
+            next_path = next(paths, None)
+            if next_path is not None:
+                pending.append((next_path, executor.submit(read_file_bytes, next_path)))
+            # 不在生成器局部变量中保留读取任务，调用方释放后文件字节即可回收
+            yield pending.popleft()
+
+
+def read_file_with_encoding(script, file_path: str, preferred_encoding: str,
+                            raw: Optional[bytes] = None) -> Tuple[str, str]:
     """
     使用合适的编码读取文件内容
 
@@ -69,86 +269,149 @@ def read_file_with_encoding(script, file_path: str, preferred_encoding: str) ->
         script: ScriptBase实例
         file_path: 文件路径
         preferred_encoding: 首选编码
+        raw: 已读取的文件字节，为None时从文件读取
 
     Returns:
         Tuple[str, str]: (文件内容, 实际使用的编码)
 
     Raises:
-        Exception: 读取文件失败
+        OSError: 读取文件失败
     """
-    encodings_to_try = [preferred_encoding, 'utf-8', 'utf-16', 'gbk', 'ascii']
+    # 一次性读取为bytes，后续只在内存中解码，避免每种编码重新打开文件
+    if raw is None:
+        raw = read_file_bytes(file_path)
+
+    # 根据BOM直接确定编码
+    bom_encoding = detect_bom_encoding(raw)
+    if bom_encoding:
+        # 与首选编码为同一编解码器时沿用调用方的写法，保持返回值一致
+        try:
+            same_codec = codecs.lookup(preferred_encoding).name == codecs.lookup(bom_encoding).name
+        except LookupError:
+            same_codec = False
+        encodings_to_try = [preferred_encoding if same_codec else bom_encoding]
+    else:
+        # 同目录上一个文件成功使用的编码：严格校验的编码优先尝试，其余排在 utf-8 之后，
+        # 只省去失败的尝试，不抢在 utf-8 之前把UTF-8文件解成乱码；其余按原顺序去重
+        file_dir = os.path.dirname(file_path)
+        last_encoding = _LAST_SUCCESS_ENCODING.get(file_dir)
+        if last_encoding and codecs.lookup(last_encoding).name in _STRICT_CODECS:
+            candidates = (last_encoding, preferred_encoding, 'utf-8', 'utf-16', 'gbk', 'ascii')
+        else:
+            candidates = (preferred_encoding, 'utf-8', last_encoding, 'utf-16', 'gbk', 'ascii')
+        encodings_to_try = list(dict.fromkeys(enc for enc in candidates if enc))
 
     for encoding in encodings_to_try:
         try:
-            script.debug(f"尝试使用 {encoding} 编码读取文件")
-            with open(file_path, 'r', encoding=encoding) as f:
-                content = f.read()
-            script.info(f"成功使用 {encoding} 编码读取文件")
-            return content, encoding
+            script.debug(f"尝试使用 {encoding} 编码解码文件")
+            content = raw.decode(encoding)
         except UnicodeDecodeError:
             script.debug(f"{encoding} 编码失败，尝试下一个")
             continue
-        except Exception as e:
-            script.error(f"使用 {encoding} 编码读取文件时发生错误: {e}")
+        except LookupError as e:
+            script.error(f"不支持的编码 {encoding}: {e}")
             continue
 
-    raise Exception("所有编码方式都无法读取文件")
+        # 与文本模式读取保持一致：统一换行符
+        if '\r' in content:
+            content = content.replace('\r\n', '\n').replace('\r', '\n')
+        if not bom_encoding:
+            _LAST_SUCCESS_ENCODING[file_dir] = encoding
+        script.info(f"成功使用 {encoding} 编码读取文件")
+        return content, encoding
+
+    # 所有编码都无法严格解码时，替换非法字节兜底，避免单个损坏字符导致整个文件无法检查；
+    # 有BOM时仍按BOM对应的编码解码，否则按UTF-8
+    fallback_encoding = bom_encoding or 'utf-8'
+    script.warning(f"所有编码方式都无法严格解码文件，使用{fallback_encoding}替换非法字节后继续: {file_path}")
+    content = raw.decode(fallback_encoding, errors='replace')
+    if '\r' in content:
+        content = content.replace('\r\n', '\n').replace('\r', '\n')
+    return content, f'{fallback_encoding}(replace)'
+
+
+@functools.lru_cache(maxsize=32)
+def _get_block_fields_pattern(start_time_field: str, end_time_field: str):
+    """
+    构建并缓存活动字段的组合正则（id/name/开始时间/结束时间一次扫描）
+
+    Args:
+        start_time_field: 开始时间字段名
+        end_time_field: 结束时间字段名
+
+    Returns:
+        re.Pattern: 组合正则，group(1)为字段名，group(2)为字段值
+    """
+    fields = ('id', 'name', start_time_field, end_time_field)
+    alternation = '|'.join(re.escape(f) for f in dict.fromkeys(fields))
+    # 值部分使用有界字符类（不跨引号、不跨行），等价于 "(.*?)" 但无需回溯
+    return re.compile(rf'({alternation})="([^"\n]*)"')
 
 
-def parse_activity_block(script, block: str, block_index: int, start_time_field: str, end_time_field: str) -> Optional[
-    Dict[str, str]]:
+def iter_config_blocks(content: str):
+    """
+    按空行分隔惰性产出配置块，分块方式与 content.split('\n\n') 一致但不构建中间列表
+
+    空白块在此处直接跳过，索引仍按原始分块位置计数
+
+    Args:
+        content: 文件内容
+
+    Yields:
+        Tuple[int, str]: (配置块索引, 配置块文本)
+    """
+    index = 0
+    start = 0
+    find = content.find
+    while start != -1:
+        end = find('\n\n', start)
+        block = content[start:end] if end != -1 else content[start:]
+        if block and not block.isspace():
+            yield index, block
+        index += 1
+        start = end + 2 if end != -1 else -1
+
+
+def parse_activity_block(script, block: str, block_index: int, start_time_field: str, end_time_field: str,
+                         fields_pattern=None) -> Optional[Dict[str, str]]:
     """
     解析单个活动配置块
 
     Args:
         script: ScriptBase实例
-        block: 配置块文本
+        block: 配置块文本（调用方保证非空白）
         block_index: 配置块索引
         start_time_field: 开始时间字段名
         end_time_field: 结束时间字段名
+        fields_pattern: 预编译的组合字段正则，为None时按字段名获取
 
     Returns:
         Optional[Dict]: 解析后的活动信息，解析失败返回None
     """
-    if not block.strip():
-        return None
-
-    # 提取信息
-    id_match = re.search(r'id="(.*?)"', block)
-    name_match = re.search(r'name="(.*?)"', block)
-
-    # 使用自定义字段名提取时间信息
-    start_time_pattern = rf'{re.escape(start_time_field)}="(.*?)"'
-    end_time_pattern = rf'{re.escape(end_time_field)}="(.*?)"'
-
-    start_time_match = re.search(start_time_pattern, block)
-    end_time_match = re.search(end_time_pattern, block)
-
-    script.debug(f"配置块 {block_index + 1} 解析:")
-    script.debug(f"  - 使用开始时间字段: {start_time_field}")
-    script.debug(f"  - 使用结束时间字段: {end_time_field}")
-    script.debug(f"  - 开始时间匹配: {start_time_match.group(1) if start_time_match else 'None'}")
-    script.debug(f"  - 结束时间匹配: {end_time_match.group(1) if end_time_match else 'None'}")
-
-    if not all([id_match, name_match, start_time_match, end_time_match]):
-        missing_fields = []
-        if not id_match:
-            missing_fields.append("id")
-        if not name_match:
-            missing_fields.append("name")
-        if not start_time_match:
-            missing_fields.append(start_time_field)
-        if not end_time_match:
-            missing_fields.append(end_time_field)
-
+    # 一次扫描提取所有字段（每个字段取首次出现的值）；findall 直接返回分组元组，省去逐个 match.group 调用
+    values: Dict[str, str] = {}
+    if fields_pattern is None:
+        fields_pattern = _get_block_fields_pattern(start_time_field, end_time_field)
+    for field, value in fields_pattern.findall(block):
+        values.setdefault(field, value)
+
+    if script.debug_enabled:
+        script.debug(f"配置块 {block_index + 1} 解析:")
+        script.debug(f"  - 使用开始时间字段: {start_time_field}")
+        script.debug(f"  - 使用结束时间字段: {end_time_field}")
+        script.debug(f"  - 开始时间匹配: {values.get(start_time_field, 'None')}")
+        script.debug(f"  - 结束时间匹配: {values.get(end_time_field, 'None')}")
+
+    missing_fields = [f for f in ('id', 'name', start_time_field, end_time_field) if f not in values]
+    if missing_fields:
         script.warning(f"配置块 {block_index + 1} 信息不完整，缺少字段: {missing_fields}，跳过")
         return None
 
     return {
-        'id': id_match.group(1),
-        'name': name_match.group(1),
-        'open_time': start_time_match.group(1),  # 统一使用open_time作为内部字段名
-        'end_time': end_time_match.group(1)  # 统一使用end_time作为内部字段名
+        'id': values['id'],
+        'name': values['name'],
+        'open_time': values[start_time_field],  # 统一使用open_time作为内部字段名
+        'end_time': values[end_time_field]  # 统一使用end_time作为内部字段名
     }
 
 
@@ -209,6 +472,36 @@ def parse_activity_block(script, block: str, block_index: int, start_time_field:
 #             'both_formats_correct': False
 #         }
 
+def build_int32_check(open_timestamp: int, end_timestamp: int) -> Dict[str, Any]:
+    """
+    根据已计算的时间戳构建int32时间戳限制检查结果 (2038年问题)
+
+    Args:
+        open_timestamp: 开始时间戳（秒）
+        end_timestamp: 结束时间戳（秒）
+
+    Returns:
+        Dict: 检查结果
+    """
+    open_exceeds = open_timestamp > INT32_MAX_TIMESTAMP
+    end_exceeds = end_timestamp > INT32_MAX_TIMESTAMP
+    return {
+        'open_timestamp': open_timestamp,
+        'end_timestamp': end_timestamp,
+        'int32_max_timestamp': INT32_MAX_TIMESTAMP,
+        'int32_limit_date': _int32_limit_date_text(),
+        'open_exceeds_int32': open_exceeds,
+        'end_exceeds_int32': end_exceeds,
+        'any_exceeds_int32': open_exceeds or end_exceeds
+    }
+
+
+@functools.lru_cache(maxsize=1)
+def _int32_limit_date_text() -> str:
+    """Int32最大时间戳对应的本地时间文本（进程内不变，只计算一次）"""
+    return datetime.datetime.fromtimestamp(INT32_MAX_TIMESTAMP).strftime("%Y-%m-%d %H:%M:%S")
+
+
 def check_int32_timestamp_limit(script, open_time: str, end_time: str) -> Dict[str, Any]:
     """
     检查时间是否超过int32时间戳限制 (2038年问题)
@@ -221,33 +514,8 @@ def check_int32_timestamp_limit(script, open_time: str, end_time: str) -> Dict[s
     Returns:
         Dict: 检查结果
     """
-    # Int32最大时间戳 (2038年1月19日 03:14:07 UTC)
-    INT32_MAX_TIMESTAMP = 2147483647
-    INT32_LIMIT_DATE = datetime.datetime.fromtimestamp(INT32_MAX_TIMESTAMP)
-
-    time_format = "%Y-%m-%d %H:%M:%S"
-
     try:
-        open_date = datetime.datetime.strptime(open_time, time_format)
-        end_date = datetime.datetime.strptime(end_time, time_format)
-
-        open_timestamp = int(open_date.timestamp())
-        end_timestamp = int(end_date.timestamp())
-
-        result = {
-            'open_timestamp': open_timestamp,
-            'end_timestamp': end_timestamp,
-            'int32_max_timestamp': INT32_MAX_TIMESTAMP,
-            'int32_limit_date': INT32_LIMIT_DATE.strftime(time_format),
-            'open_exceeds_int32': open_timestamp > INT32_MAX_TIMESTAMP,
-            'end_exceeds_int32': end_timestamp > INT32_MAX_TIMESTAMP,
-            'any_exceeds_int32': False
-        }
-
-        # 检查是否有时间超出限制
-        result['any_exceeds_int32'] = result['open_exceeds_int32'] or result['end_exceeds_int32']
-
-        return result
+        return build_int32_check(int(parse_timestamp(open_time)), int(parse_timestamp(end_time)))
 
     except Exception as e:
         script.error(f"Int32时间戳检查失败: {e}")
@@ -256,95 +524,91 @@ def check_int32_timestamp_limit(script, open_time: str, end_time: str) -> Dict[s
             'check_failed': True
         }
 
+
+@functools.lru_cache(maxsize=4096)
+def _compute_duration(open_time: str, end_time: str) -> Optional[Dict[str, Any]]:
+    """
+    计算活动持续时间（纯计算，按时间字符串对缓存，不输出日志）
+
+    返回的字典在相同时间配置的活动间共享，调用方不应修改
+
+    Args:
+        open_time: 开始时间字符串
+        end_time: 结束时间字符串
+
+    Returns:
+        Optional[Dict]: 时间计算结果，结束时间早于或等于开始时间返回None
+
+    Raises:
+        ValueError: 时间格式错误
+        OSError: 时间戳转换错误
+    """
+    # 解析时间字符串并转换为时间戳（秒）
+    open_timestamp = parse_timestamp(open_time)
+    end_timestamp = parse_timestamp(end_time)
+
+    # 计算时间差（秒）
+    duration_seconds = end_timestamp - open_timestamp
+
+    if duration_seconds <= 0:
+        return None
+
+    # 从时间戳差值计算各个时间单位
+    total_seconds = int(duration_seconds)
+    days, remaining_seconds = divmod(total_seconds, 24 * 3600)
+    hours, rem = divmod(remaining_seconds, 3600)
+    minutes, seconds = divmod(rem, 60)
+
+    # 保存原始计算结果
+    original_days = days
+    adjusted = False
+
+    # 特殊处理：当持续时间为x天23:59:59时，直接处理为x+1天
+    if remaining_seconds == _ALMOST_FULL_DAY_SECONDS:
+        days += 1
+        hours = 0
+        minutes = 0
+        seconds = 0
+        adjusted = True
+
+    # 计算调整后的总小时数
+    total_hours = days * 24 + hours + minutes / 60 + seconds / 3600
+
+    return {
+        'duration_seconds': duration_seconds,
+        'total_seconds': total_seconds,
+        'open_timestamp': open_timestamp,
+        'end_timestamp': end_timestamp,
+        'days': days,
+        'hours': hours,
+        'minutes': minutes,
+        'seconds': seconds,
+        'total_hours': round(float(total_hours), 2),
+        'original_days': original_days,
+        'adjusted': adjusted,
+        'int32_check': build_int32_check(int(open_timestamp), int(end_timestamp))  # Int32检查结果
+        # 'format_check': format_check  # 注释掉时间格式检查结果
+    }
+
+
 def calculate_duration(script, open_time: str, end_time: str) -> Optional[Dict[str, Any]]:
     """
     计算活动持续时间 (增强版 - 包含Int32检查)
     使用时间戳计算，特殊处理：当持续时间为x天23:59:59时，直接处理为x+1天
     同时检查Int32时间戳限制
 
+    计算结果按(开始时间, 结束时间)缓存，本函数只负责日志输出
+
     Args:
         script: ScriptBase实例
         open_time: 开始时间字符串
         end_time: 结束时间字符串
 
     Returns:
-        Optional[Dict]: 时间计算结果，计算失败返回None
+        Optional[Dict]: 时间计算结果（只读），计算失败返回None
     """
-    time_format = "%Y-%m-%d %H:%M:%S"
-
     try:
-        # 解析时间字符串
-        open_date = datetime.datetime.strptime(open_time, time_format)
-        end_date = datetime.datetime.strptime(end_time, time_format)
-
-        # 转换为时间戳（秒）
-        open_timestamp = open_date.timestamp()
-        end_timestamp = end_date.timestamp()
-
-        # 计算时间差（秒）
-        duration_seconds = end_timestamp - open_timestamp
-
-        if duration_seconds <= 0:
-            script.warning(f"结束时间早于或等于开始时间: {open_time} -> {end_time}")
-            return None
-
-        # 从时间戳差值计算各个时间单位
-        total_seconds = int(duration_seconds)
-        days = total_seconds // (24 * 3600)
-        remaining_seconds = total_seconds % (24 * 3600)
-        hours = remaining_seconds // 3600
-        minutes = (remaining_seconds % 3600) // 60
-        seconds = remaining_seconds % 60
-
-        # 保存原始计算结果
-        original_days = days
-        adjusted = False
-
-        # 特殊处理：当持续时间为x天23:59:59时，直接处理为x+1天
-        if hours == 23 and minutes == 59 and seconds == 59:
-            days += 1
-            hours = 0
-            minutes = 0
-            seconds = 0
-            adjusted = True
-            script.debug(f"检测到{original_days}天23:59:59格式，调整为{original_days}天 -> {days}天")
-
-        # 计算调整后的总小时数
-        total_hours = days * 24 + hours + minutes / 60 + seconds / 3600
-
-        # Int32时间戳检查
-        int32_check = check_int32_timestamp_limit(script, open_time, end_time)
-
-        # 注释掉时间格式标准检查
-        # format_check = check_time_format_standard(script, open_time, end_time)
-
-        # 如果发现Int32风险，记录警告
-        if int32_check.get('any_exceeds_int32', False):
-            script.warning(f"活动时间超出Int32时间戳限制(2038年): {open_time} -> {end_time}")
-
-        # 注释掉时间格式不标准的警告
-        # if not format_check.get('both_formats_correct', True):
-        #     if not format_check.get('open_format_correct', True):
-        #         script.warning(f"开始时间格式不标准: {open_time}，期望格式：XX:00:00，实际格式：{format_check.get('actual_open_format', 'Unknown')}")
-        #     if not format_check.get('end_format_correct', True):
-        #         script.warning(f"结束时间格式不标准: {end_time}，期望格式：XX:59:59，实际格式：{format_check.get('actual_end_format', 'Unknown')}")
-
-        return {
-            'duration_seconds': duration_seconds,
-            'total_seconds': total_seconds,
-            'open_timestamp': open_timestamp,
-            'end_timestamp': end_timestamp,
-            'days': days,
-            'hours': hours,
-            'minutes': minutes,
-            'seconds': seconds,
-            'total_hours': round(float(total_hours), 2),
-            'original_days': original_days,
-            'adjusted': adjusted,
-            'int32_check': int32_check  # Int32检查结果
-            # 'format_check': format_check  # 注释掉时间格式检查结果
-        }
-
+        duration_info = _compute_duration(open_time, end_time)
     except ValueError as e:
         script.error(f"时间格式错误: {open_time} -> {end_time}, 错误: {e}")
         return None
@@ -352,46 +616,77 @@ def calculate_duration(script, open_time: str, end_time: str) -> Optional[Dict[s
         script.error(f"时间戳转换错误: {open_time} -> {end_time}, 错误: {e}")
         return None
 
+    if duration_info is None:
+        script.warning(f"结束时间早于或等于开始时间: {open_time} -> {end_time}")
+        return None
+
+    if duration_info['adjusted'] and script.debug_enabled:
+        script.debug(f"检测到{duration_info['original_days']}天23:59:59格式，"
+                     f"调整为{duration_info['original_days']}天 -> {duration_info['days']}天")
+
+    # 注释掉时间格式标准检查
+    # format_check = check_time_format_standard(script, open_time, end_time)
 
-def is_days_in_expected(script, duration_info: Dict[str, Any], expected_days: List[int]) -> bool:
+    # 如果发现Int32风险，记录警告
+    if duration_info['int32_check']['any_exceeds_int32']:
+        script.warning(f"活动时间超出Int32时间戳限制(2038年): {open_time} -> {end_time}")
+
+    # 注释掉时间格式不标准的警告
+    # if not format_check.get('both_formats_correct', True):
+    #     if not format_check.get('open_format_correct', True):
+    #         script.warning(f"开始时间格式不标准: {open_time}，期望格式：XX:00:00，实际格式：{format_check.get('actual_open_format', 'Unknown')}")
+    #     if not format_check.get('end_format_correct', True):
+    #         script.warning(f"结束时间格式不标准: {end_time}，期望格式：XX:59:59，实际格式：{format_check.get('actual_end_format', 'Unknown')}")
+
+    return duration_info
+
+
+def is_days_in_expected(script, duration_info: Dict[str, Any], expected_days: FrozenSet[int]) -> bool:
     """
     检查持续天数是否在允许范围内
 
     Args:
         script: ScriptBase实例
         duration_info: 持续时间信息
-        expected_days: 期望天数列表
+        expected_days: 期望天数集合（由调用方预先构建，避免每次调用重建集合）
 
     Returns:
         bool: 是否在期望范围内
     """
     days = duration_info['days']
-    ok = days in set(expected_days or [])
-    script.debug(f"持续时间天数检查: {days} 天 - {'在范围内' if ok else '不在范围'}，允许: {expected_days}")
+    ok = days in expected_days
+    if script.debug_enabled:
+        script.debug(f"持续时间天数检查: {days} 天 - {'在范围内' if ok else '不在范围'}，允许: {_expected_days_text(expected_days)}")
     return ok
 
 
+@functools.lru_cache(maxsize=8)
+def _expected_days_text(expected_days: FrozenSet[int]) -> str:
+    """期望天数的排序展示文本（同一集合只排序一次，供逐活动的调试日志复用）"""
+    return str(sorted(expected_days))
+
+
+# Windows控制台下需移除的emoji（模块加载时编译一次，非Windows平台为None）
+_EMOJI_PATTERN = re.compile("["
+                            u"\U0001F600-\U0001F64F"  # emoticons
+                            u"\U0001F300-\U0001F5FF"  # symbols & pictographs
+                            u"\U0001F680-\U0001F6FF"  # transport & map symbols
+                            u"\U0001F1E0-\U0001F1FF"  # flags
+                            "]+", flags=re.UNICODE) if sys.platform == "win32" else None
+
+
 def print_message(message):
     """
     简单打印消息（无颜色）
     """
-    import sys
-    import re
-
     try:
         # 确保message是字符串
         if not isinstance(message, str):
             message = str(message)
 
         # 在Windows环境下移除emoji
-        if sys.platform == "win32":
-            emoji_pattern = re.compile("["
-                                       u"\U0001F600-\U0001F64F"  # emoticons
-                                       u"\U0001F300-\U0001F5FF"  # symbols & pictographs
-                                       u"\U0001F680-\U0001F6FF"  # transport & map symbols
-                                       u"\U0001F1E0-\U0001F1FF"  # flags
-                                       "]+", flags=re.UNICODE)
-            message = emoji_pattern.sub('', message)
+        if _EMOJI_PATTERN is not None:
+            message = _EMOJI_PATTERN.sub('', message)
 
         print(message)
 
@@ -441,32 +736,40 @@ def validate_parameters(script, directory: str, encoding: str, expected_days: Li
 
     script.info(f"验证目录路径: {directory}")
 
-    # 检查目录是否存在
-    if not os.path.exists(directory):
+    # 检查目录是否存在（一次stat同时得到是否存在和是否为目录）
+    try:
+        directory_mode = os.stat(directory).st_mode
+    except (OSError, ValueError):
+        directory_mode = None
+
+    if directory_mode is None:
         error_msg = f"目录不存在: {directory}"
         script.error(error_msg)
         script.info(f"当前工作目录: {os.getcwd()}")
 
         # 尝试列出父目录内容（如果存在）
+        # 直接尝试打开父目录，不存在时由scandir抛出FileNotFoundError，无需先stat一次
         parent_dir = os.path.dirname(directory)
-        if os.path.exists(parent_dir):
-            try:
-                contents = os.listdir(parent_dir)
-                script.info(f"父目录 {parent_dir} 的内容: {contents[:10]}")  # 只显示前10个
-            except Exception as e:
-                script.warning(f"无法读取父目录内容: {e}")
+        try:
+            # 只取前10个条目，不必列出整个目录
+            with os.scandir(parent_dir) as it:
+                contents = [entry.name for entry in itertools.islice(it, 10)]
+            script.info(f"父目录 {parent_dir} 的内容: {contents}")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            script.warning(f"无法读取父目录内容: {e}")
 
         return False, error_msg
 
     # 检查是否为目录
-    if not os.path.isdir(directory):
+    if not stat.S_ISDIR(directory_mode):
         error_msg = f"路径不是目录: {directory}"
         script.error(error_msg)
         return False, error_msg
 
     # 验证编码参数
-    valid_encodings = ['UTF-16', 'UTF-8', 'GBK', 'ASCII']
-    if encoding not in valid_encodings:
+    if encoding not in _RECOMMENDED_ENCODINGS:
         script.warning(f"编码 '{encoding}' 不在推荐列表中，但将尝试使用")
 
     # 验证期望天数参数
@@ -531,9 +834,7 @@ Optional[List[int]], Optional[str], Optional[str], Optional[str]]:
         # 获取参数，使用配置文件中定义的默认值
         directory = script.get_parameter('directory', 'C:\\temp')
         encoding = script.get_parameter('encoding', 'UTF-16')
-        file_names = script.get_parameter('file_names', [
-            'TIMER_MAIN.data', 'TIMER_MAIN.data.txt', 'timer_main.data', 'timer_main.data.txt'
-        ])
+        file_names = script.get_parameter('file_names', list(_DEFAULT_FILE_NAMES))
         recursive = script.get_parameter('recursive', False)
         expected_days_param = script.get_parameter('expected_days', [3, 7, 14])
         
@@ -572,16 +873,18 @@ Optional[List[int]], Optional[str], Optional[str], Optional[str]]:
         else:
             end_time_field = str(end_time_field).strip()
 
-        # file_names 处理为列表[str]
+        # file_names 处理为列表[str]，每项只做一次转换和去空白，find_target_files 不再重复处理
         if file_names is None:
-            file_names = ['TIMER_MAIN.data', 'TIMER_MAIN.data.txt', 'timer_main.data', 'timer_main.data.txt']
+            file_names = list(_DEFAULT_FILE_NAMES)
             script.warning("file_names参数为None，使用默认值")
-        elif isinstance(file_names, str):
-            file_names = [seg.strip() for seg in file_names.split(',') if seg.strip()]
-        elif isinstance(file_names, (list, tuple)):
-            file_names = [str(x).strip() for x in file_names if str(x).strip()]
         else:
-            file_names = [str(file_names)]
+            if isinstance(file_names, str):
+                raw_names = file_names.split(',')
+            elif isinstance(file_names, (list, tuple)):
+                raw_names = file_names
+            else:
+                raw_names = [file_names]
+            file_names = [name for name in (str(x).strip() for x in raw_names) if name]
 
         # recursive 转为布尔
         recursive = bool(recursive)
@@ -688,7 +991,7 @@ def main_logic(script):
         error_msg = f"未在目录 {directory} 找到目标配置文件"
         script.error(error_msg)
         try:
-            files_in_dir = os.listdir(directory)
+            files_in_dir = [entry.name for entry in scan_directory_entries(directory)]
             script.info(f"目录 {directory} 中的文件: {files_in_dir[:50]}")
         except Exception as list_error:
             script.warning(f"无法列出目录内容: {list_error}")
@@ -705,13 +1008,19 @@ def main_logic(script):
 
     script.info("开始解析活动配置块...")
 
+    # 期望天数集合只构建一次
+    expected_days_set = frozenset(expected_days or ())
+
+    # 字段正则在循环外一次性获取
+    fields_pattern = _get_block_fields_pattern(start_time_field, end_time_field)
+
     # 逐文件读取并检查
-    for file_path in target_files:
+    for file_path, raw_future in prefetch_file_bytes(target_files):
         script.info(f"准备读取文件: {file_path}")
         try:
-            content, actual_encoding = read_file_with_encoding(script, file_path, encoding)
-            blocks = content.split('\n\n')
-            script.info(f"成功读取文件，使用编码: {actual_encoding}，共找到 {len(blocks)} 个配置块")
+            content, actual_encoding = read_file_with_encoding(script, file_path, encoding, raw_future.result())
+            block_count = content.count('\n\n') + 1
+            script.info(f"成功读取文件，使用编码: {actual_encoding}，共找到 {block_count} 个配置块")
         except Exception as e:
             error_msg = f"读取文件失败: {str(e)}"
             script.error(error_msg)
@@ -719,21 +1028,26 @@ def main_logic(script):
             script.debug(f"文件读取异常堆栈: {traceback.format_exc()}")
             return script.error_result(error_msg, 'FileReadError')
 
+        # 解码完成后释放原始字节（UTF-16文件约为文本的两倍大小），解析期间只保留解码后的文本
+        del raw_future
+
         file_total = 0
         file_invalid = 0
         file_abnormal = 0
         file_int32_risk = 0
         # file_format_error = 0  # 注释掉文件级时间格式错误计数
 
-        for i, block in enumerate(blocks):
+        for i, block in iter_config_blocks(content):
             # 解析活动信息 - 传入自定义字段名
-            activity_info = parse_activity_block(script, block, i, start_time_field, end_time_field)
+            activity_info = parse_activity_block(script, block, i, start_time_field, end_time_field,
+                                                 fields_pattern)
             if not activity_info:
                 continue
 
             total_activities += 1
             file_total += 1
-            script.debug(f"处理活动 {total_activities}: {activity_info['name']} (ID: {activity_info['id']})")
+            if script.debug_enabled:
+                script.debug(f"处理活动 {total_activities}: {activity_info['name']} (ID: {activity_info['id']})")
 
             # 计算持续时间
             duration_info = calculate_duration(
@@ -746,13 +1060,13 @@ def main_logic(script):
                 invalid_time_activities += 1
                 file_invalid += 1
                 # 收集无效时间活动详情
-                invalid_activities_details.append({
-                    'file_path': file_path,
-                    'id': activity_info['id'],
-                    'name': activity_info['name'],
-                    'open_time': activity_info['open_time'],
-                    'end_time': activity_info['end_time']
-                })
+                invalid_activities_details.append(InvalidTimeActivity(
+                    file_path=file_path,
+                    id=activity_info['id'],
+                    name=activity_info['name'],
+                    open_time=activity_info['open_time'],
+                    end_time=activity_info['end_time']
+                ))
                 # 注释掉原有的print_message调用
                 # print_message(
                 #     f"无效的活动时间配置: 文件={os.path.basename(file_path)}, ID={activity_info['id']}, Name={activity_info['name']}, 开始时间={activity_info['open_time']}, 结束时间={activity_info['end_time']}"
@@ -760,26 +1074,26 @@ def main_logic(script):
                 continue
 
             # 检查天数是否在配置范围
-            if not is_days_in_expected(script, duration_info, expected_days or []):
-                abnormal_activity = {
-                    'file_path': file_path,
-                    'id': activity_info['id'],
-                    'name': activity_info['name'],
-                    'open_time': activity_info['open_time'],
-                    'end_time': activity_info['end_time'],
-                    'duration_days': duration_info['days'],
-                    'duration_hours': duration_info['hours'],
-                    'duration_minutes': duration_info['minutes'],
-                    'duration_text': f"{duration_info['days']}天 {duration_info['hours']}小时 {duration_info['minutes']}分钟",
-                    'total_duration_hours': duration_info['total_hours']
-                }
+            if not is_days_in_expected(script, duration_info, expected_days_set):
+                abnormal_activity = AbnormalActivity(
+                    file_path=file_path,
+                    id=activity_info['id'],
+                    name=activity_info['name'],
+                    open_time=activity_info['open_time'],
+                    end_time=activity_info['end_time'],
+                    duration_days=duration_info['days'],
+                    duration_hours=duration_info['hours'],
+                    duration_minutes=duration_info['minutes'],
+                    duration_text=f"{duration_info['days']}天 {duration_info['hours']}小时 {duration_info['minutes']}分钟",
+                    total_duration_hours=duration_info['total_hours']
+                )
                 abnormal_duration_activities.append(abnormal_activity)
 
                 file_abnormal += 1
 
                 # 注释掉原有的print_message调用
                 # print_message(
-                #     f"持续天数不在允许范围 ({expected_days}): 文件={os.path.basename(file_path)}, ID={activity_info['id']}, Name={activity_info['name']}, 开始时间={activity_info['open_time']}, 结束时间={activity_info['end_time']}, 持续时间={abnormal_activity['duration_text']}"
+                #     f"持续天数不在允许范围 ({expected_days}): 文件={os.path.basename(file_path)}, ID={activity_info['id']}, Name={activity_info['name']}, 开始时间={activity_info['open_time']}, 结束时间={activity_info['end_time']}, 持续时间={abnormal_activity.duration_text}"
                 # )
 
             # 检查Int32时间戳风险
@@ -787,15 +1101,15 @@ def main_logic(script):
                 int32_info = duration_info['int32_check']
 
                 if int32_info.get('any_exceeds_int32'):
-                    int32_risk_activity = {
-                        'file_path': file_path,
-                        'id': activity_info['id'],
-                        'name': activity_info['name'],
-                        'open_time': activity_info['open_time'],
-                        'end_time': activity_info['end_time'],
-                        'open_exceeds': int32_info.get('open_exceeds_int32', False),
-                        'end_exceeds': int32_info.get('end_exceeds_int32', False)
-                    }
+                    int32_risk_activity = Int32RiskActivity(
+                        file_path=file_path,
+                        id=activity_info['id'],
+                        name=activity_info['name'],
+                        open_time=activity_info['open_time'],
+                        end_time=activity_info['end_time'],
+                        open_exceeds=int32_info.get('open_exceeds_int32', False),
+                        end_exceeds=int32_info.get('end_exceeds_int32', False)
+                    )
                     int32_risk_activities.append(int32_risk_activity)
                     file_int32_risk += 1
 
@@ -846,24 +1160,26 @@ def main_logic(script):
             # 'format_error_activities': file_format_error  # 注释掉文件级时间格式错误统计
         })
 
+        # 释放当前文件内容，避免读取下一个文件时两份内容同时驻留内存
+        del content
+
     # 4. 生成检查结果摘要
+    abnormal_count = len(abnormal_duration_activities)
+    int32_risk_count = len(int32_risk_activities)
     script.info("=== 活动时间配置检查完成 ===")
     script.info(f"检查统计:")
     script.info(f"   - 总活动数: {total_activities}")
     script.info(f"   - 时间格式无效的活动数: {invalid_time_activities}")
-    script.info(f"   - 持续时间异常的活动数: {len(abnormal_duration_activities)}")
-    script.info(f"   - Int32时间戳风险活动数: {len(int32_risk_activities)}")
+    script.info(f"   - 持续时间异常的活动数: {abnormal_count}")
+    script.info(f"   - Int32时间戳风险活动数: {int32_risk_count}")
     # script.info(f"   - 时间格式不标准的活动数: {len(format_error_activities)}")  # 注释掉
 
     # 5. 构建结果数据
-    has_issues = (len(abnormal_duration_activities) > 0 or
-                  invalid_time_activities > 0 or
-                  len(int32_risk_activities) > 0)
-    # len(format_error_activities) > 0)  # 注释掉格式错误检查
-    issues_count = (len(abnormal_duration_activities) +
+    issues_count = (abnormal_count +
                     invalid_time_activities +
-                    len(int32_risk_activities))
+                    int32_risk_count)
     # len(format_error_activities))  # 注释掉格式错误计数
+    has_issues = issues_count > 0
 
     result_data = {
         'input_parameters': {
@@ -883,11 +1199,11 @@ def main_logic(script):
         'analysis_results': {
             'total_activities': total_activities,
             'invalid_time_activities': invalid_time_activities,
-            'abnormal_duration_count': len(abnormal_duration_activities),
-            'abnormal_duration_activities': abnormal_duration_activities,
-            'int32_risk_count': len(int32_risk_activities),
-            'int32_risk_activities': int32_risk_activities,
-            'invalid_activities_details': invalid_activities_details  # 新增字段
+            'abnormal_duration_count': abnormal_count,
+            'abnormal_duration_activities': [activity._asdict() for activity in abnormal_duration_activities],
+            'int32_risk_count': int32_risk_count,
+            'int32_risk_activities': [activity._asdict() for activity in int32_risk_activities],
+            'invalid_activities_details': [activity._asdict() for activity in invalid_activities_details]  # 新增字段
             # 'format_error_count': len(format_error_activities),  # 注释掉
             # 'format_error_activities': format_error_activities   # 注释掉
         },
@@ -903,7 +1219,7 @@ def main_logic(script):
             'internal_end_time_field': 'end_time'
         },
         'int32_limit_info': {
-            'limit_timestamp': 2147483647,
+            'limit_timestamp': INT32_MAX_TIMESTAMP,
             'limit_date': '2038-01-19 03:14:07'
         }
         # 'format_standard_info': {  # 注释掉时间格式标准信息
@@ -934,47 +1250,47 @@ def main_logic(script):
         if invalid_activities_details:
             message_parts.append(f"\n[ERROR] 无效时间格式活动 ({len(invalid_activities_details)}个):")
             for idx, activity in enumerate(invalid_activities_details[:5], 1):  # 最多显示5个
-                file_name = os.path.basename(activity['file_path'])
+                file_name = os.path.basename(activity.file_path)
                 message_parts.append(
-                    f"  {idx}. ID:{activity['id']} | {activity['name']} | "
-                    f"文件:{file_name} | 时间:{activity['open_time']} ~ {activity['end_time']}"
+                    f"  {idx}. ID:{activity.id} | {activity.name} | "
+                    f"文件:{file_name} | 时间:{activity.open_time} ~ {activity.end_time}"
                 )
             if len(invalid_activities_details) > 5:
                 message_parts.append(f"  ... 还有 {len(invalid_activities_details) - 5} 个相似问题")
 
         # 2. 持续时间异常的活动
         if abnormal_duration_activities:
-            message_parts.append(f"\n[WARNING] 持续时间异常活动 ({len(abnormal_duration_activities)}个):")
+            message_parts.append(f"\n[WARNING] 持续时间异常活动 ({abnormal_count}个):")
             message_parts.append(f"   (允许范围: {expected_days}天)")
             for idx, activity in enumerate(abnormal_duration_activities[:5], 1):  # 最多显示5个
-                file_name = os.path.basename(activity['file_path'])
+                file_name = os.path.basename(activity.file_path)
                 message_parts.append(
-                    f"  {idx}. ID:{activity['id']} | {activity['name']} | "
-                    f"文件:{file_name} | 实际:{activity['duration_days']}天 | "
-                    f"时间:{activity['open_time']} ~ {activity['end_time']}"
+                    f"  {idx}. ID:{activity.id} | {activity.name} | "
+                    f"文件:{file_name} | 实际:{activity.duration_days}天 | "
+                    f"时间:{activity.open_time} ~ {activity.end_time}"
                 )
-            if len(abnormal_duration_activities) > 5:
-                message_parts.append(f"  ... 还有 {len(abnormal_duration_activities) - 5} 个相似问题")
+            if abnormal_count > 5:
+                message_parts.append(f"  ... 还有 {abnormal_count - 5} 个相似问题")
 
         # 3. Int32时间戳风险活动
         if int32_risk_activities:
-            message_parts.append(f"\n[CRITICAL] Int32时间戳风险活动 ({len(int32_risk_activities)}个):")
+            message_parts.append(f"\n[CRITICAL] Int32时间戳风险活动 ({int32_risk_count}个):")
             message_parts.append("   (超过2038年限制)")
             for idx, activity in enumerate(int32_risk_activities[:5], 1):  # 最多显示5个
-                file_name = os.path.basename(activity['file_path'])
+                file_name = os.path.basename(activity.file_path)
                 risk_type = []
-                if activity['open_exceeds']:
+                if activity.open_exceeds:
                     risk_type.append("开始时间")
-                if activity['end_exceeds']:
+                if activity.end_exceeds:
                     risk_type.append("结束时间")
 
                 message_parts.append(
-                    f"  {idx}. ID:{activity['id']} | {activity['name']} | "
+                    f"  {idx}. ID:{activity.id} | {activity.name} | "
                     f"文件:{file_name} | 风险:{'/'.join(risk_type)} | "
-                    f"时间:{activity['open_time']} ~ {activity['end_time']}"
+                    f"时间:{activity.open_time} ~ {activity.end_time}"
                 )
-            if len(int32_risk_activities) > 5:
-                message_parts.append(f"  ... 还有 {len(int32_risk_activities) - 5} 个相似问题")
+            if int32_risk_count > 5:
+                message_parts.append(f"  ... 还有 {int32_risk_count - 5} 个相似问题")
 
         message_parts.append("")  # 空行分隔
         message_parts.append("建议: 请检查并修复上述问题活动的时间配置")
@@ -9,13 +9,17 @@
 import os
 import os.path
 import re
-import chardet
+import charset_normalizer
+import functools
+import mmap
+import operator
 import json
 import sys
 import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, Any, Optional, List, Union
+from typing import Dict, Any, Optional, List, Tuple, Union, Callable, Iterator
 from typing import Pattern
 
 
@@ -30,6 +34,10 @@ class ScriptBase:
         self.parameters = self._get_parameters()
         self.page_context = self._get_page_context()
         self.execution_id = self._get_execution_id()
+        # 日志直接调用stderr.write，每条日志一次写入，省去print的参数处理
+        self._write_stderr = sys.stderr.write
+        # 调试日志开关（SCRIPT_DEBUG设为0/false/no时关闭），热点循环中先检查再构造调试信息
+        self.debug_enabled = os.environ.get('SCRIPT_DEBUG', '1').strip().lower() not in ('0', 'false', 'no')
         self.start_time = time.time()
 
         # 输出初始化信息
@@ -70,20 +78,22 @@ class ScriptBase:
         return self.parameters.get(key, default)
 
     def debug(self, message: str):
-        """输出调试信息到stderr"""
-        print(f"[DEBUG] {message}", file=sys.stderr)
+        """输出调试信息到stderr（debug_enabled为False时不输出）"""
+        if not self.debug_enabled:
+            return
+        self._write_stderr(f"[DEBUG] {message}\n")
 
     def info(self, message: str):
         """输出信息到stderr"""
-        print(f"[INFO] {message}", file=sys.stderr)
+        self._write_stderr(f"[INFO] {message}\n")
 
     def warning(self, message: str):
         """输出警告信息到stderr"""
-        print(f"[WARNING] {message}", file=sys.stderr)
+        self._write_stderr(f"[WARNING] {message}\n")
 
     def error(self, message: str):
         """输出错误信息到stderr"""
-        print(f"[ERROR] {message}", file=sys.stderr)
+        self._write_stderr(f"[ERROR] {message}\n")
 
     def success_result(self, message: str, data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """创建成功结果
@@ -150,13 +160,14 @@ class ScriptBase:
         self.debug(f"{self.script_name}执行完成，准备输出结果")
 
         # 修复编码问题：确保JSON输出兼容性
+        # 不使用缩进：json.dumps在indent为None时走C编码器，超标块较多时序列化明显更快
         try:
             # 先尝试使用ensure_ascii=False
-            json_str = json.dumps(result, ensure_ascii=False, indent=2)
+            json_str = json.dumps(result, ensure_ascii=False)
             print(json_str)
         except UnicodeEncodeError:
             # 如果出现编码错误，使用ensure_ascii=True
-            json_str = json.dumps(result, ensure_ascii=True, indent=2)
+            json_str = json.dumps(result, ensure_ascii=True)
             print(json_str)
 
     def run_with_error_handling(self, main_func):
@@ -188,12 +199,120 @@ class ScriptBase:
 
 
 # 业务逻辑函数
-def detect_encoding(file_path: str) -> str:
-    """检测文件的编码格式"""
+# 无BOM且UTF-8解码失败时，在检测结果之后依次尝试的编码
+FALLBACK_ENCODINGS = ('gbk', 'utf-16')
+
+# 编码检测只取文件开头的样本，检测准确率在几十KB后基本不再提升
+DETECT_SAMPLE_SIZE = 64 * 1024
+
+# 配置块内的 key="value" 项
+# 每个块只有几十到几百字符，re2 等 DFA 引擎每次调用的固定开销远大于匹配本身（实测慢一个数量级），
+# 加 \b 锚点也不会更快，保持标准库 re
+PAIR_PATTERN = re.compile(r'(\w+)\s*=\s*"([^"]+)"')
+
+
+@functools.lru_cache(maxsize=32)
+def compile_block_pattern(block_name: str) -> Pattern:
+    """按配置块名称编译块匹配正则（同一块名只编译一次）
+
+    正则以块名字面量开头，re 会先用字面前缀快速定位再匹配；
+    改用 str.find 逐段查找 '{' 和 '};' 时每个块都要回到Python层处理，实测慢约一倍
+    """
+    return re.compile(rf'{re.escape(block_name)}\s*\{{\s*([^}}]+)\s*\}};')
+
+
+def iter_blocks_with_line(content: str, block_name: str) -> Iterator[Tuple[int, str]]:
+    """逐个产出 (起始行号, 块内容)
+
+    一次 finditer 同时取块内容和起始位置；匹配按位置递增返回，只统计相邻两个块之间的换行数，
+    整个文件只扫描一遍，不需要额外建立换行位置表
+    """
+    start_line, last_pos = 1, 0
+    for m in compile_block_pattern(block_name).finditer(content):
+        start_pos = m.start()
+        start_line += content.count('\n', last_pos, start_pos)
+        last_pos = start_pos
+        yield start_line, m.group(1)
+
+
+def detect_encoding(raw_data: bytes) -> Optional[str]:
+    """根据开头的BOM检测文件编码，无BOM返回None"""
+    head = raw_data[:4]
+    if head.startswith(b'\xef\xbb\xbf'):
+        return 'utf-8-sig'
+    if head.startswith((b'\xff\xfe', b'\xfe\xff')):
+        return 'utf-16'
+    return None
+
+
+def guess_encoding(raw_data) -> Optional[str]:
+    """用charset_normalizer检测文件开头样本的编码，无法判断返回None"""
+    best = charset_normalizer.from_bytes(raw_data[:DETECT_SAMPLE_SIZE]).best()
+    return best.encoding if best else None
+
+
+def candidate_encodings(raw_data):
+    """按优先级产出待尝试的编码：BOM > UTF-8 > 检测结果 > FALLBACK_ENCODINGS
+
+    统计检测只在UTF-8解码失败后才执行，常见的BOM/UTF-8文件不做检测
+    """
+    bom_encoding = detect_encoding(raw_data[:4])
+    if bom_encoding:
+        yield bom_encoding
+        return
+
+    yield 'utf-8'
+    tried = {'utf-8'}
+    for encoding in (guess_encoding(raw_data), *FALLBACK_ENCODINGS):
+        if encoding and encoding not in tried:
+            tried.add(encoding)
+            yield encoding
+
+
+def decode_content(raw_data, file_path: str) -> Tuple[str, str]:
+    """解码文件字节（bytes或mmap等缓冲区对象），返回 (文件内容, 使用的编码)"""
+    for encoding in candidate_encodings(raw_data):
+        try:
+            content = str(raw_data, encoding)
+        except UnicodeDecodeError:
+            continue
+        # 与文本模式读取保持一致：统一换行符
+        # Windows 导出的配置通常只有 \r\n，先替换它再检查残留的 \r，避免再复制一份整个文件
+        if '\r' in content:
+            content = content.replace('\r\n', '\n')
+            if '\r' in content:
+                content = content.replace('\r', '\n')
+        return content, encoding
+
+    raise ValueError(f"无法识别文件编码: {file_path}")
+
+
+def read_file_content(file_path: str) -> Tuple[str, str]:
+    """读取文件并解码，返回 (文件内容, 使用的编码)
+
+    通过只读内存映射直接解码，不再先把整个文件复制成一份bytes，大文件的峰值内存约减少一个文件大小
+    """
     with open(file_path, 'rb') as file:
-        raw_data = file.read()
-    result = chardet.detect(raw_data)
-    return result['encoding']
+        if os.fstat(file.fileno()).st_size == 0:
+            # 空文件无法映射
+            return decode_content(b'', file_path)
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as raw_data:
+            return decode_content(raw_data, file_path)
+
+
+@functools.lru_cache(maxsize=32)
+def compile_field_pattern(field: str) -> Pattern:
+    """编译只匹配单个配置项 field="value" 的正则，与 PAIR_PATTERN 的键切分方式一致"""
+    if not re.fullmatch(r'\w+', field):
+        # PAIR_PATTERN 的键只由单词字符组成，其他字段名永远取不到值
+        return re.compile(r'(?!)')
+    return re.compile(rf'(?<!\w){field}\s*=\s*"([^"]+)"')
+
+
+def find_field_value(block: str, field: str) -> Optional[str]:
+    """取配置块中单个配置项的值，重复出现时取最后一个（与构建完整字典的结果一致）"""
+    values = compile_field_pattern(field).findall(block)
+    return values[-1] if values else None
 
 
 def parse_reward_ids(reward_id_param: Union[str, List[str]]) -> List[Dict[str, Any]]:
@@ -269,47 +388,77 @@ def check_reward_id_match(tp_id: str, reward_id_checkers: List[Dict[str, Any]])
     return None
 
 
+def build_reward_id_filter(
+        reward_id_checkers: List[Dict[str, Any]]
+) -> Callable[[str], Tuple[bool, Optional[Dict[str, Any]]]]:
+    """根据奖励ID检查器预先生成过滤函数，逐块调用时不再判断检查器类型
+
+    Args:
+        reward_id_checkers: 奖励ID检查器列表
+
+    Returns:
+        过滤函数，参数为 tp_id，返回 (是否通过, 匹配的检查器)，与 check_reward_id_match 的匹配顺序一致
+    """
+    if not reward_id_checkers:
+        # 如果没有提供奖励ID过滤器，则全部通过
+        return lambda tp_id: (True, None)
+
+    matchers = []
+    for checker in reward_id_checkers:
+        if checker['regex'] is not None:
+            matchers.append((checker['regex'].search, checker))
+        elif checker['value'] is not None:
+            matchers.append((functools.partial(operator.eq, checker['value']), checker))
+
+    def reward_id_filter(tp_id: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        for matches, checker in matchers:
+            if matches(tp_id):
+                return True, checker
+        return False, None
+
+    return reward_id_filter
+
+
 def parse_file(
         file_path: str,
         block_name: str,
         max_reward: int,
         count: str,
         reward_id_checkers: List[Dict[str, Any]]
-) -> List[Dict[str, Any]]:
-    """解析文件并提取大于阈值且匹配奖励ID条件的指定配置块"""
-    encoding = detect_encoding(file_path)
-    with open(file_path, 'r', encoding=encoding) as file:
-        content = file.read()
-
-    # 动态构建正则表达式匹配指定的配置块
-    escaped_block_name = re.escape(block_name)
-    pattern = rf'{escaped_block_name}\s*\{{\s*([^}}]+)\s*\}};'
-    blocks = re.findall(pattern, content)
+) -> Tuple[List[Dict[str, Any]], str]:
+    """解析文件并提取大于阈值且匹配奖励ID条件的指定配置块
+
+    Returns:
+        (符合条件的配置块列表, 读取文件使用的编码)，调用方无需再次检测编码
+    """
+    # 整个文件解码后再匹配而不逐行流式读取：候选编码要对全文解码成功才算确定（UTF-8 失败需回退GBK等），
+    # 流式读取到中途才失败时已产出的块无法撤回；且块可以跨行，逐行状态机还得自行拼接缓冲
+    content, encoding = read_file_content(file_path)
+
     result: List[Dict[str, Any]] = []
+    reward_id_filter = build_reward_id_filter(reward_id_checkers)
 
-    for block in blocks:
-        # 匹配每一项 key="value";
-        pairs = re.findall(r'(\w+)\s*=\s*"([^"]+)"', block)
-        item = {k: v for k, v in pairs}
+    # 逐个匹配指定的配置块，不构建中间列表
+    for block_match in compile_block_pattern(block_name).finditer(content):
+        block = block_match.group(1)
 
+        # 先只取奖励数值判断是否超过阈值，多数配置块在此直接跳过，不构建完整字典
+        # 注：把count/tpId用前瞻断言合并进块正则并不更快（贪婪前瞻需回溯整个块），故保持两步匹配
         # 奖励数值字段约定为 count（若后续有变化可扩展）
         try:
-            count_value = int(item.get(count, '0'))
+            count_value = int(find_field_value(block, count) or '0')
         except ValueError:
             count_value = 0
+        if count_value <= max_reward:
+            continue
 
         # 奖励ID过滤（tpId），支持多个正则或精确匹配
-        tp_id = item.get('tpId', '')
-        matched_checker = None
-
-        if reward_id_checkers:
-            matched_checker = check_reward_id_match(tp_id, reward_id_checkers)
-            id_match_ok = matched_checker is not None
-        else:
-            # 如果没有提供奖励ID过滤器，则全部通过
-            id_match_ok = True
+        tp_id = find_field_value(block, 'tpId') or ''
+        id_match_ok, matched_checker = reward_id_filter(tp_id)
 
-        if id_match_ok and count_value > max_reward:
+        if id_match_ok:
+            # 匹配每一项 key="value";
+            item = dict(PAIR_PATTERN.findall(block))
             item['count_value'] = count_value
             if matched_checker:
                 item['matched_reward_id'] = {
@@ -319,7 +468,7 @@ def parse_file(
                 }
             result.append(item)
 
-    return result
+    return result, encoding
 
 
 def find_target_files(root_directory: str, file_names: List[str], recursive: bool = False) -> List[str]:
@@ -331,22 +480,142 @@ def find_target_files(root_directory: str, file_names: List[str], recursive: boo
         return matched
 
     if recursive:
-        for dirpath, _, files in os.walk(root_directory):
-            for fname in files:
-                if fname in normalized:
-                    matched.append(os.path.join(dirpath, fname))
+        # 显式栈遍历，与os.walk顺序一致；DirEntry自带文件类型，无需逐项stat
+        stack = [root_directory]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+
+            sub_dirs = []
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    # 与os.walk默认行为一致，不进入符号链接目录
+                    if not entry.is_symlink():
+                        sub_dirs.append(entry.path)
+                elif entry.name in normalized:
+                    matched.append(entry.path)
+            stack.extend(reversed(sub_dirs))
     else:
         try:
-            for fname in os.listdir(root_directory):
-                path = os.path.join(root_directory, fname)
-                if os.path.isfile(path) and fname in normalized:
-                    matched.append(path)
+            with os.scandir(root_directory) as it:
+                for entry in it:
+                    if entry.name in normalized and entry.is_file():
+                        matched.append(entry.path)
         except Exception:
             pass
 
     return matched
 
 
+def compile_rule(rule: Dict[str, Any]) -> Dict[str, Any]:
+    """预处理单条规则：奖励ID匹配函数、数量字段和阈值只解析一次，供逐块匹配复用
+
+    奖励ID匹配方式在此确定：未配置时为None（匹配全部），合法正则用其search，非法正则退化为精确匹配
+    """
+    rid = str(rule.get('reward_id', '')).strip()
+    matches = None
+    if rid:
+        try:
+            matches = re.compile(rid).search
+        except re.error:
+            matches = functools.partial(operator.eq, rid)
+    try:
+        threshold = int(rule.get('max_reward', 0))
+    except Exception:
+        threshold = 0
+    return {
+        'rule': rule,
+        'matches': matches,
+        'count_field': str(rule.get('count_id', 'count')).strip() or 'count',
+        'threshold': threshold
+    }
+
+
+def match_rule_reward_id(compiled_rule: Dict[str, Any], tp_id: str) -> bool:
+    """判断 tpId 是否匹配规则中的奖励ID（支持正则/精确，未配置奖励ID时匹配全部）"""
+    matches = compiled_rule['matches']
+    return matches is None or bool(matches(tp_id))
+
+
+def check_file_rules(file_path: str, block_name: str, parsed_rules: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """按规则检查单个文件，返回该文件的检查结果（不输出日志，可在线程池中并发执行）"""
+    # 针对每条规则执行匹配统计
+    # 不按 (路径, mtime) 缓存解析结果：脚本每次执行都是独立子进程，同一文件在一次执行中只读一次
+    content, encoding = read_file_content(file_path)
+
+    compiled_rules = [compile_rule(rule) for rule in parsed_rules]
+    exceeded: List[Dict[str, Any]] = []
+    rule_matches: Dict[str, List[bool]] = {}
+
+    for start_line, block in iter_blocks_with_line(content, block_name):
+        item = dict(PAIR_PATTERN.findall(block))
+        tp_id = item.get('tpId', '')
+
+        matches = None
+        for idx, cr in enumerate(compiled_rules):
+            count_field = cr['count_field']
+            threshold = cr['threshold']
+
+            # 数量对比
+            try:
+                count_val = int(item.get(count_field, '0'))
+            except ValueError:
+                count_val = 0
+            if count_val <= threshold:
+                continue
+
+            # 只有数量超标时才需要匹配奖励ID；同一 tpId 往往在文件中重复出现，各规则对它的匹配结果只计算一次
+            if matches is None:
+                matches = rule_matches.get(tp_id)
+                if matches is None:
+                    matches = rule_matches[tp_id] = [match_rule_reward_id(r, tp_id) for r in compiled_rules]
+
+            if matches[idx]:
+                exceeded.append({
+                    "line": start_line,
+                    "tpId": tp_id,
+                    "count_field": count_field,
+                    "count_value": count_val,
+                    "max_reward": threshold,
+                    "rule": cr['rule'],
+                    "block": item
+                })
+
+    return {
+        "file_path": file_path,
+        "encoding": encoding,
+        "exceeded_blocks": exceeded,
+        "exceeded_count": len(exceeded)
+    }
+
+
+def run_file_checks(target_files: List[str], block_name: str,
+                    parsed_rules: List[Dict[str, Any]]) -> List[Tuple[Optional[Dict[str, Any]], Optional[Exception]]]:
+    """检查所有目标文件，按 target_files 顺序返回 (检查结果, 异常)
+
+    多个文件时用线程池并发读取和解析（文件读取会释放GIL），单个文件直接在当前线程执行
+    """
+    def check_one(file_path: str) -> Tuple[Optional[Dict[str, Any]], Optional[Exception]]:
+        try:
+            return check_file_rules(file_path, block_name, parsed_rules), None
+        except Exception as e:
+            return None, e
+
+    if len(target_files) <= 1:
+        return [check_one(file_path) for file_path in target_files]
+
+    with ThreadPoolExecutor(max_workers=min(8, len(target_files))) as executor:
+        return list(executor.map(check_one, target_files))
+
+
 def main_logic(script: ScriptBase) -> Dict[str, Any]:
     """主要业务逻辑：扫描大于最大奖励数值的配置项，支持多个reward_id检查"""
 
@@ -393,92 +662,31 @@ def main_logic(script: ScriptBase) -> Dict[str, Any]:
     all_results: Dict[str, Any] = {}
     warning_files: List[str] = []
 
-    for file_path in target_files:
+    # 各文件的读取和解析相互独立，先统一执行，再按原顺序汇总结果并输出日志
+    outcomes = run_file_checks(target_files, block_name, parsed_rules)
+
+    for file_path, (file_result, file_error) in zip(target_files, outcomes):
         script.debug(f"正在检查文件: {file_path}")
-        try:
-            # 针对每条规则执行匹配统计
-            encoding = detect_encoding(file_path)
-            with open(file_path, 'r', encoding=encoding) as f:
-                content = f.read()
-
-            escaped_block_name = re.escape(block_name)
-            block_pattern = rf'{escaped_block_name}\s*\{{\s*([^}}]+)\s*\}};'
-            blocks = re.findall(block_pattern, content)
-
-            # 为了返回行号：建立每个匹配块的起始行
-            lines = content.splitlines()
-            line_offsets: List[int] = []
-            for m in re.finditer(block_pattern, content):
-                start_pos = m.start()
-                start_line = content.count('\n', 0, start_pos) + 1
-                line_offsets.append(start_line)
-
-            exceeded: List[Dict[str, Any]] = []
-
-            for idx, block in enumerate(blocks):
-                pairs = re.findall(r'(\w+)\s*=\s*"([^"]+)"', block)
-                item = {k: v for k, v in pairs}
-                tp_id = item.get('tpId', '')
-
-                for rule in parsed_rules:
-                    rid = str(rule.get('reward_id', '')).strip()
-                    count_field = str(rule.get('count_id', 'count')).strip() or 'count'
-                    try:
-                        threshold = int(rule.get('max_reward', 0))
-                    except Exception:
-                        threshold = 0
-
-                    # 匹配奖励ID（支持正则/精确）
-                    match_ok = False
-                    if rid:
-                        try:
-                            rgx = re.compile(rid)
-                            match_ok = bool(rgx.search(tp_id))
-                        except re.error:
-                            match_ok = (tp_id == rid)
-                    else:
-                        match_ok = True
-
-                    # 数量对比
-                    try:
-                        count_val = int(item.get(count_field, '0'))
-                    except ValueError:
-                        count_val = 0
-
-                    if match_ok and count_val > threshold:
-                        exceeded.append({
-                            "line": line_offsets[idx] if idx < len(line_offsets) else None,
-                            "tpId": tp_id,
-                            "count_field": count_field,
-                            "count_value": count_val,
-                            "max_reward": threshold,
-                            "rule": rule,
-                            "block": item
-                        })
-
-            filtered_blocks = exceeded
-            all_results[file_path] = {
-                "file_path": file_path,
-                "encoding": encoding,
-                "exceeded_blocks": filtered_blocks,
-                "exceeded_count": len(filtered_blocks)
-            }
+        if file_error is not None:
+            error_msg = f"解析文件失败: {file_path}, 错误: {str(file_error)}"
+            script.error(error_msg)
+            all_results[file_path] = {"error": error_msg, "exceeded_blocks": []}
+            continue
 
-            if filtered_blocks:
-                script.warning(f"发现大于阈值的配置: {file_path}, 共 {len(filtered_blocks)} 条")
-                warning_files.append(file_path)
+        filtered_blocks = file_result["exceeded_blocks"]
+        all_results[file_path] = file_result
 
-                # 输出详细的匹配信息
+        if filtered_blocks:
+            script.warning(f"发现大于阈值的配置: {file_path}, 共 {len(filtered_blocks)} 条")
+            warning_files.append(file_path)
+
+            # 输出详细的匹配信息（关闭调试日志时整体跳过，不逐条格式化）
+            if script.debug_enabled:
                 for blk in filtered_blocks:
                     script.debug(
                         f"  行{blk.get('line')}: tpId={blk.get('tpId')}, {blk.get('count_field')}={blk.get('count_value')} > {blk.get('max_reward')} 规则={blk.get('rule')}")
-            else:
-                script.info(f"文件检查通过: {file_path}")
-
-        except Exception as e:
-            error_msg = f"解析文件失败: {file_path}, 错误: {str(e)}"
-            script.error(error_msg)
-            all_results[file_path] = {"error": error_msg, "exceeded_blocks": []}
+        else:
+            script.info(f"文件检查通过: {file_path}")
 
     # 统计信息
     total_files = len(target_files)
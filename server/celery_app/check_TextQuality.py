@@ -13,147 +13,330 @@
 - DEEPSEEK_API_KEY (必填)
 - DEEPSEEK_API_BASE (可选，默认 https://api.deepseek.com)
 - DEEPSEEK_MODEL    (可选，默认 deepseek-v3.1)
+- TEXT_QUALITY_CACHE (可选，检查结果缓存库路径，默认 ~/.cache/check_TextQuality.db)
 """
 
 import os
 import re
+import codecs
+import io
+import functools
+import hashlib
 import json
+import random
+import sqlite3
 import time
-import chardet
 import requests
-from typing import Any, Dict, List, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Pattern, Tuple
 
 from script_base import ScriptBase, create_simple_script
 
 
+# 每批发送给 DeepSeek 的条目数；回复超出 max_tokens 被截断时该批记为失败，不计入已检查条目
+BATCH_SIZE = 20
+
+# 同时进行的 API 请求数
+MAX_CONCURRENT_REQUESTS = 8
+
+
+class JitterRetry(Retry):
+    """指数退避加随机抖动的重试策略，避免并发批次在同一时刻集中重试"""
+
+    def get_backoff_time(self) -> float:
+        backoff = super().get_backoff_time()
+        return backoff + random.uniform(0, backoff) if backoff > 0 else 0
+
+
+# 只在服务端没有处理请求时自动重试（共最多3次请求）：连接失败、限流（429）和服务暂不可用（503）。
+# 读超时等请求已发出后的错误不重试：补全请求按次计费，服务端可能已生成回复并扣费；
+# 402（余额不足）和表示模型不可用的 400/404 也不在重试范围内，直接交给调用方处理
+HTTP_RETRY = JitterRetry(
+    total=2,
+    connect=2,
+    read=0,
+    other=0,
+    status=2,
+    status_forcelist=(429, 503),
+    allowed_methods=frozenset({'POST'}),
+    backoff_factor=0.5,
+    raise_on_status=False
+)
+
+# 复用连接的HTTP会话：模型回退重试和并发批次共用连接池，省去重复的TCP/TLS握手
+# 连接池大小与并发请求数一致，并发批次不会因池满而丢弃连接
+HTTP_SESSION = requests.Session()
+HTTP_SESSION.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=MAX_CONCURRENT_REQUESTS, max_retries=HTTP_RETRY))
+HTTP_SESSION.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=MAX_CONCURRENT_REQUESTS, max_retries=HTTP_RETRY))
+
+# 表示模型名不可用的状态码，只有这些错误才换下一个候选模型重试
+MODEL_UNAVAILABLE_STATUS = (400, 404)
+
+# 最近一次请求成功的模型，同一次运行中的后续批次优先使用
+_LAST_GOOD_MODEL: Optional[str] = None
+
+# 系统提示词和请求中不随批次变化的部分
+SYSTEM_MESSAGE = {
+    'role': 'system',
+    'content': (
+        "你是中文文本校对助手。检查以下文本的：拼写错误、语法问题、标点问题。"
+        "输出JSON数组，格式：[{\"index\": 0, \"original\": \"原文\", \"issues\": [\"问题1\"], \"suggestions\": [\"建议1\"]}]"
+    )
+}
+BASE_PAYLOAD = {
+    'temperature': 0.2,
+    # 回复会回显每条原文（最长 MAX_TEXT_LENGTH 字），按 deepseek-chat 的输出上限留足空间
+    'max_tokens': 8192,
+    'response_format': {'type': 'json_object'}
+}
+REQUEST_HEADERS = {
+    'Content-Type': 'application/json',
+    'Accept': 'application/json'
+}
+
+# 单条文本发送的最大长度
+MAX_TEXT_LENGTH = 300
+
+# 内容不是UTF-8时，编码检测库只检测这么多字节的样本
+DETECT_SAMPLE_SIZE = 32 * 1024
+
+# 第一个非ASCII字节，编码检测的样本从这里开始
+NON_ASCII_PATTERN = re.compile(rb'[\x80-\xff]')
+
+# 配置块内的 key="value" 项
+PAIR_PATTERN = re.compile(r'(\w+)\s*=\s*"([^"]+)"')
+
+# 一行文本，分隔符与 str.splitlines 相同
+LINE_PATTERN = re.compile(r'[^\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029]+')
+
+# 不含正则元字符的字段名（标识符）
+SAFE_FIELD_PATTERN = re.compile(r'[A-Za-z_][A-Za-z0-9_]*\Z')
+
+# 值得检查的文本：至少包含连续两个汉字或英文字母
+CHECKWORTHY_PATTERN = re.compile(r'[\u4e00-\u9fff\u3400-\u4dbfA-Za-z]{2,}')
+
+# 模型回复中的JSON对象数组（回复不是纯JSON数组时的容错解析）
+ARRAY_PATTERN = re.compile(r'\[\s*\{.*\}\s*\]', re.DOTALL)
+
+# 按配置块提取时优先收集的文本类字段
+CANDIDATE_KEYS = frozenset({'desc', 'description', 'text', 'title', 'name', 'label', 'tips', 'message', 'msg', 'content'})
+
+
 # ==================== 辅助函数区域 ====================
 
-def detect_encoding(file_path: str) -> str:
-    """检测文件编码"""
-    with open(file_path, 'rb') as f:
-        raw = f.read()
-    res = chardet.detect(raw)
+def detect_encoding(raw: bytes) -> str:
+    """检测文件内容的编码
+
+    有BOM、整个内容是合法UTF-8（含纯ASCII）或合法GB18030时直接返回；否则从第一个非ASCII字节起取样本，
+    用 charset_normalizer（不可用或无结果时用 chardet）检测
+    """
+    # UTF-32 LE 的BOM以 UTF-16 LE 的BOM开头，需先判断
+    if raw.startswith((codecs.BOM_UTF32_LE, codecs.BOM_UTF32_BE)):
+        return 'utf-32'
+    if raw.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if raw.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    # 校验整个内容而不是开头的样本：开头是纯ASCII、后面才出现GBK的文件不能判为UTF-8
+    try:
+        codecs.utf_8_decode(raw, 'strict', True)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+
+    # 配置文件多为GBK：整个内容能按 GB18030（GBK的超集）严格解码时直接采用，
+    # 检测库在只有少量汉字的样本上常误判为 big5 等编码
+    try:
+        codecs.decode(raw, 'gb18030')
+        return 'gb18030'
+    except UnicodeDecodeError:
+        pass
+
+    # 样本从第一个非ASCII字节开始，避免纯ASCII的样本被检测为 ascii
+    first = NON_ASCII_PATTERN.search(raw)
+    start = first.start() if first else 0
+    sample = raw[start:start + DETECT_SAMPLE_SIZE]
+
+    # 走到这里才导入检测库：多数文件在上面已确定编码，省去导入耗时
+    try:
+        from charset_normalizer import from_bytes
+    except ImportError:
+        from_bytes = None
+    if from_bytes is not None:
+        best = from_bytes(sample).best()
+        if best is not None:
+            return best.encoding
+
+    import chardet
+    res = chardet.detect(sample)
     return res['encoding'] or 'utf-8'
 
 
 def read_file_text(script: ScriptBase, path: str) -> Optional[str]:
-    """读取文件内容，自动检测编码"""
+    """读取文件内容，自动检测编码
+
+    文件只按二进制读取一次，检测编码后整体解码
+    """
     try:
-        enc = detect_encoding(path)
-        with open(path, 'r', encoding=enc, errors='ignore') as f:
-            return f.read()
+        with open(path, 'rb') as f:
+            raw = f.read()
+        enc = detect_encoding(raw)
+        text = raw.decode(enc, errors='ignore')
     except Exception as e:
         script.error(f"读取文件失败: {e}")
         return None
+    # 与文本模式读取一致，统一换行符为 \n
+    text = text.replace('\r\n', '\n')
+    if '\r' in text:
+        text = text.replace('\r', '\n')
+    return text
 
 
-def extract_entries(script: ScriptBase, content: str, field: Optional[str]) -> List[str]:
-    """从文件内容中提取待检查的文本条目"""
-    entries: List[str] = []
-    candidate_keys = {'desc', 'description', 'text', 'title', 'name', 'label', 'tips', 'message', 'msg', 'content'}
+@functools.lru_cache(maxsize=64)
+def compile_field_patterns(field: str) -> Tuple[Pattern, Pattern]:
+    """按字段名编译 (字段值正则, 配置块正则)，同一字段只编译一次
 
+    使用标准库 re：google-re2 的Python绑定每次调用都要转换整个字符串，在整份配置上实测慢4~30倍
+    """
+    # 常见的标识符字段名不含正则元字符，无需转义
+    escaped = field if SAFE_FIELD_PATTERN.match(field) else re.escape(field)
+    return (
+        re.compile(rf'\b{escaped}\s*=\s*"([^"]+)"'),
+        re.compile(rf'{escaped}\s*\{{\s*([^}}]+)\s*\}};')
+    )
+
+
+def iter_raw_entries(content: str, field: Optional[str]) -> Iterator[str]:
+    """逐个产出文件中去掉首尾空白后非空的文本条目"""
     if field:
+        field_pattern, block_pattern = compile_field_patterns(field)
+
         # 直接匹配字段
-        pattern = rf'\b{re.escape(field)}\s*=\s*"([^"]+)"'
-        matches = re.findall(pattern, content)
-        if matches:
-            entries.extend([m.strip() for m in matches if m.strip()])
+        found = False
+        for m in field_pattern.findall(content):
+            m = m.strip()
+            if m:
+                found = True
+                yield m
 
         # 作为配置块名称匹配
-        if not entries:
-            block_pattern = rf'{re.escape(field)}\s*\{{\s*([^}}]+)\s*\}};'
-            blocks = re.findall(block_pattern, content)
-            for block in blocks:
-                pairs = re.findall(r'(\w+)\s*=\s*"([^"]+)"', block)
-                for k, v in pairs:
-                    if (k in candidate_keys or not entries) and v.strip():
-                        entries.append(v.strip())
+        if not found:
+            for block in block_pattern.findall(content):
+                for k, v in PAIR_PATTERN.findall(block):
+                    v = v.strip()
+                    if v and (k in CANDIDATE_KEYS or not found):
+                        found = True
+                        yield v
     else:
-        # 按行提取
-        for line in content.splitlines():
-            line = line.strip()
+        # 按行提取：逐行匹配，不用 splitlines 先生成全部行的列表
+        for m in LINE_PATTERN.finditer(content):
+            line = m.group().strip()
             if line:
-                entries.append(line)
+                yield line
 
-    script.info(f"提取到 {len(entries)} 个文本条目")
-    return entries
 
+def extract_entries(script: ScriptBase, content: str, field: Optional[str]) -> List[str]:
+    """从文件内容中提取待检查的文本条目
 
-def deepseek_check(script: ScriptBase, items: List[str]) -> Dict[str, Any]:
-    """调用 DeepSeek API 进行文本质量检查"""
-    api_key = os.getenv('DEEPSEEK_API_KEY')
-    if not api_key:
-        return {'error': 'DEEPSEEK_API_KEY 未设置', 'result': []}
-
-    api_base = (os.getenv('DEEPSEEK_API_BASE') or 'https://api.deepseek.com').rstrip('/')
-    url = f"{api_base}/v1/chat/completions"
+    提取与过滤在同一次遍历中完成，不生成中间列表
+    """
+    entries: List[str] = []
+    skipped = 0
+    for entry in iter_raw_entries(content, field):
+        # 过滤纯数字、符号、ID等不含连续文字的条目，不发送给 API
+        if CHECKWORTHY_PATTERN.search(entry):
+            entries.append(entry)
+        else:
+            skipped += 1
+    if skipped:
+        script.info(f"跳过 {skipped} 个不含文字的条目")
 
-    # 兼容常见模型名；优先使用外部指定
-    preferred_model = os.getenv('DEEPSEEK_MODEL')
-    model_candidates: List[str] = []
-    if preferred_model:
-        model_candidates.append(preferred_model)
-    # 官方公开可用模型（按优先顺序）
-    model_candidates.extend(['deepseek-chat', 'deepseek-reasoner'])
+    script.info(f"提取到 {len(entries)} 个文本条目")
+    return entries
 
-    # 限制条目数量和长度
-    preview = items[:30]
-    preview = [t[:300] if len(t) > 300 else t for t in preview]
 
-    prompt = (
-        "你是中文文本校对助手。检查以下文本的：拼写错误、语法问题、标点问题。"
-        "输出JSON数组，格式：[{\"index\": 0, \"original\": \"原文\", \"issues\": [\"问题1\"], \"suggestions\": [\"建议1\"]}]"
-    )
+def parse_issues(content: str) -> Optional[List[Any]]:
+    """解析模型回复中的问题数组，无法解析时返回 None"""
+    try:
+        issues = json.loads(content)
+        if isinstance(issues, list):
+            return issues
+    except ValueError:
+        pass
+
+    # 容错：回复不是数组（如包在对象里或夹杂说明文字）时，先取首个 '[' 到最后一个 ']' 之间的文本
+    start, end = content.find('['), content.rfind(']')
+    if start == -1 or end < start:
+        return None
+    try:
+        issues = json.loads(content[start:end + 1])
+        if isinstance(issues, list):
+            return issues
+    except ValueError:
+        pass
+
+    # 再用正则抓取JSON对象数组
+    array_match = ARRAY_PATTERN.search(content, start, end + 1)
+    if not array_match:
+        return None
+    try:
+        issues = json.loads(array_match.group(0))
+    except ValueError:
+        return None
+    return issues if isinstance(issues, list) else None
 
-    base_payload = {
-        'messages': [
-            {'role': 'system', 'content': prompt},
-            {'role': 'user', 'content': json.dumps({'entries': [
-                {'index': i, 'text': t} for i, t in enumerate(preview)
-            ]}, ensure_ascii=False)}
-        ],
-        'temperature': 0.2,
-        'max_tokens': 1024,
-        'response_format': {'type': 'json_object'}
-    }
 
-    headers = {
-        'Authorization': f'Bearer {api_key}',
-        'Content-Type': 'application/json',
-        'Accept': 'application/json'
-    }
+def request_batch(script: ScriptBase, url: str, headers: Dict[str, str],
+                  model_candidates: List[str], batch: List[str], offset: int) -> Dict[str, Any]:
+    """对一批条目调用 DeepSeek API，条目序号按 offset 换算为全部条目中的序号"""
+    base_payload = dict(BASE_PAYLOAD, messages=[
+        SYSTEM_MESSAGE,
+        {'role': 'user', 'content': json.dumps({'entries': [
+            {'index': offset + i, 'text': t} for i, t in enumerate(batch)
+        ]}, ensure_ascii=False)}
+    ])
 
+    global _LAST_GOOD_MODEL
     last_error_text: Optional[str] = None
     last_status: Optional[int] = None
     used_model: Optional[str] = None
 
+    # 已有批次请求成功过的模型排在最前，后续批次不再逐个试探
+    last_good = _LAST_GOOD_MODEL
+    if last_good in model_candidates and model_candidates[0] != last_good:
+        model_candidates = [last_good] + [m for m in model_candidates if m != last_good]
+
     for candidate in model_candidates:
         used_model = candidate
         payload = dict(base_payload, model=candidate)
+        # 自行以UTF-8编码请求体：requests 的 json= 参数会把每个汉字转义成6字节的 \uXXXX，请求体大一倍
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
         try:
-            resp = requests.post(url, headers=headers, json=payload, timeout=60)
-            if resp.status_code == 400:
-                # 记录错误并尝试下一个候选模型
+            resp = HTTP_SESSION.post(url, headers=headers, data=body, timeout=60)
+            if resp.status_code in MODEL_UNAVAILABLE_STATUS:
+                # 模型不可用：记录错误并尝试下一个候选模型
                 last_error_text = resp.text
                 last_status = resp.status_code
-                script.warning(f"DeepSeek 400 错误，尝试备用模型: {candidate} -> {last_error_text[:200]}")
+                script.warning(f"DeepSeek {last_status} 错误，尝试备用模型: {candidate} -> {last_error_text[:200]}")
                 continue
             resp.raise_for_status()
-            data = resp.json()
-            content = data.get('choices', [{}])[0].get('message', {}).get('content', '')
-            # 解析返回的JSON
-            try:
-                issues = json.loads(content)
-                if not isinstance(issues, list):
-                    # 容错：如果不是数组，尝试从文本中抓取首个JSON数组
-                    array_match = re.search(r"\[\s*\{[\s\S]*\}\s*\]", content)
-                    issues = json.loads(array_match.group(0)) if array_match else []
-            except Exception:
-                issues = []
+            # 不使用 stream=True 流式接收：回复是一个完整的JSON，汇总消息也要等所有批次结束才能生成，
+            # 边收边解析省不下时间；等待时间已由多个批次并发请求重叠
+            data = json.loads(resp.content)
+            choice = data.get('choices', [{}])[0]
+            content = choice.get('message', {}).get('content', '')
+            _LAST_GOOD_MODEL = candidate
+
+            # 回复被截断或无法解析时整批记为失败：不能当作“未发现问题”计入结果或写入缓存
+            if choice.get('finish_reason') == 'length':
+                return {'error': '模型回复超出 max_tokens 被截断', 'result': []}
+            issues = parse_issues(content)
+            if issues is None:
+                return {'error': f'无法解析模型回复: {content[:200]}', 'result': []}
 
             return {
-                'checked_count': len(preview),
-                'total_entries': len(items),
                 'result': issues,
                 'model': used_model or ''
             }
@@ -170,29 +353,194 @@ def deepseek_check(script: ScriptBase, items: List[str]) -> Dict[str, Any]:
                 last_error_text = str(e)
         except Exception as e:
             last_error_text = str(e)
+        # 网络错误、超时或其他HTTP错误与模型无关，换模型重试也会失败
+        break
 
-    # 所有候选模型均失败
+    # 所有候选模型均失败，或遇到与模型无关的错误
     detail = f"HTTP {last_status}: {last_error_text[:300]}" if last_status else (last_error_text or '未知错误')
     return {'error': f'API请求失败: {detail}', 'result': []}
 
 
-def format_detailed_message(script: ScriptBase, ds_result: Dict[str, Any]) -> str:
-    """格式化详细消息，包含所有issues和suggestions"""
-    if ds_result.get('error'):
-        return f"检查失败: {ds_result['error']}"
+def cache_scope(model_candidates: List[str]) -> str:
+    """检查结果缓存的作用域：候选模型、提示词或请求参数变化后，旧的检查结果不再命中"""
+    config = json.dumps([model_candidates, SYSTEM_MESSAGE['content'], BASE_PAYLOAD],
+                        ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(config.encode('utf-8')).hexdigest()
+
+
+def text_hash(text: str, scope: str) -> str:
+    """检查结果缓存的键"""
+    return hashlib.sha1(f'{scope}\n{text}'.encode('utf-8')).hexdigest()
+
 
-    issues_list = ds_result.get('result', [])
-    if not issues_list:
-        return "文本检查完成，未发现任何问题"
+def open_result_cache(script: ScriptBase) -> Optional[sqlite3.Connection]:
+    """打开检查结果缓存库（作用域和文本的哈希 -> 该文本的检查结果），无法打开时返回None，本次不使用缓存"""
+    path = os.getenv('TEXT_QUALITY_CACHE') or os.path.join(os.path.expanduser('~'), '.cache', 'check_TextQuality.db')
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = sqlite3.connect(path, timeout=10)
+        conn.execute('CREATE TABLE IF NOT EXISTS results (hash TEXT PRIMARY KEY, items TEXT NOT NULL)')
+        return conn
+    except (OSError, sqlite3.Error) as e:
+        script.warning(f"无法打开检查结果缓存，本次不使用缓存: {e}")
+        return None
 
-    lines = []
-    problem_count = 0
-    suggestion_count = 0
 
-    lines.append("文本质量检查结果：")
-    lines.append("")
+def load_cached_results(conn: sqlite3.Connection, texts: List[str], scope: str) -> Dict[str, List[Any]]:
+    """查询已缓存的文本检查结果，返回 {文本: 检查结果列表}"""
+    texts_by_hash = {text_hash(t, scope): t for t in texts}
+    hashes = list(texts_by_hash)
+    found: Dict[str, List[Any]] = {}
+    # 分段查询，避免超过 SQLite 单条语句的参数个数上限
+    for i in range(0, len(hashes), 500):
+        chunk = hashes[i:i + 500]
+        placeholders = ','.join('?' * len(chunk))
+        for h, items in conn.execute(f'SELECT hash, items FROM results WHERE hash IN ({placeholders})', chunk):
+            found[texts_by_hash[h]] = json.loads(items)
+    return found
+
+
+def save_cached_results(conn: sqlite3.Connection, results: Dict[str, List[Any]], scope: str):
+    """写入本次新检查的文本结果"""
+    with conn:
+        conn.executemany(
+            'INSERT OR REPLACE INTO results (hash, items) VALUES (?, ?)',
+            [(text_hash(t, scope), json.dumps(items, ensure_ascii=False)) for t, items in results.items()]
+        )
+
 
-    for idx, item in enumerate(issues_list, 1):
+def expand_results_to_entries(positions: Dict[str, List[int]],
+                              results_by_text: Dict[str, List[Any]]) -> Tuple[List[Any], int]:
+    """把按文本归集的检查结果展开到每个条目（重复文本的每个位置各一份），按条目序号排序
+
+    Returns:
+        (检查结果列表, 已检查的条目数)
+    """
+    expanded: List[Tuple[int, Any]] = []
+    checked_count = 0
+    for text, text_positions in positions.items():
+        text_items = results_by_text.get(text)
+        if text_items is None:
+            continue
+        checked_count += len(text_positions)
+        for i in text_positions:
+            expanded.extend((i, dict(item, index=i)) for item in text_items)
+    expanded.sort(key=lambda pair: pair[0])
+    return [item for _, item in expanded], checked_count
+
+
+def deepseek_check(script: ScriptBase, items: List[str]) -> Dict[str, Any]:
+    """调用 DeepSeek API 进行文本质量检查
+
+    全部条目按 BATCH_SIZE 分批，多批时用线程池并发请求（耗时主要在网络往返），
+    部分批次失败时返回其余批次的结果并记录失败批次数
+    """
+    api_key = os.getenv('DEEPSEEK_API_KEY')
+    if not api_key:
+        return {'error': 'DEEPSEEK_API_KEY 未设置', 'result': []}
+
+    api_base = (os.getenv('DEEPSEEK_API_BASE') or 'https://api.deepseek.com').rstrip('/')
+    url = f"{api_base}/v1/chat/completions"
+
+    # 兼容常见模型名；优先使用外部指定
+    preferred_model = os.getenv('DEEPSEEK_MODEL')
+    model_candidates: List[str] = []
+    if preferred_model:
+        model_candidates.append(preferred_model)
+    # 官方公开可用模型（按优先顺序）
+    model_candidates.extend(['deepseek-chat', 'deepseek-reasoner'])
+
+    # 限制单条长度；相同文本只检查一次，positions 记录每条去重文本在全部条目中的序号
+    positions: Dict[str, List[int]] = {}
+    for i, t in enumerate(items):
+        positions.setdefault(t[:MAX_TEXT_LENGTH], []).append(i)
+    unique = list(positions)
+    if len(unique) < len(items):
+        script.info(f"去除重复文本后需检查 {len(unique)}/{len(items)} 条")
+
+    # 已缓存结果的文本不再请求 API
+    cache = open_result_cache(script)
+    scope = cache_scope(model_candidates)
+    results_by_text: Dict[str, List[Any]] = {}
+    if cache is not None:
+        try:
+            results_by_text = load_cached_results(cache, unique, scope)
+        except (sqlite3.Error, ValueError) as e:
+            script.warning(f"读取检查结果缓存失败: {e}")
+        if results_by_text:
+            script.info(f"{len(results_by_text)} 条文本命中缓存")
+    to_send = [t for t in unique if t not in results_by_text]
+    offsets = range(0, len(to_send), BATCH_SIZE)
+
+    headers = dict(REQUEST_HEADERS, Authorization=f'Bearer {api_key}')
+
+    def check_one(offset: int) -> Dict[str, Any]:
+        return request_batch(script, url, headers, model_candidates,
+                             to_send[offset:offset + BATCH_SIZE], offset)
+
+    if len(offsets) > 1:
+        script.info(f"共 {len(to_send)} 条文本，分 {len(offsets)} 批并发检查")
+        with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_REQUESTS, len(offsets))) as executor:
+            batch_results = list(executor.map(check_one, offsets))
+    else:
+        batch_results = [check_one(offset) for offset in offsets]
+
+    # 按文本归集新的检查结果；无法对应到条目的结果原样保留在最后
+    fresh: Dict[str, List[Any]] = {}
+    unmatched: List[Any] = []
+    errors: List[str] = []
+    used_model = ''
+    for offset, batch_result in zip(offsets, batch_results):
+        if batch_result.get('error'):
+            errors.append(batch_result['error'])
+            continue
+        used_model = used_model or batch_result['model']
+        batch = to_send[offset:offset + BATCH_SIZE]
+        batch_items: Dict[str, List[Any]] = {t: [] for t in batch}
+        unmatched_before = len(unmatched)
+        for item in batch_result['result']:
+            u = item.get('index') if isinstance(item, dict) else None
+            if isinstance(u, int) and offset <= u < offset + len(batch):
+                batch_items[to_send[u]].append(item)
+            else:
+                unmatched.append(item)
+        results_by_text.update(batch_items)
+        # 只缓存能完整对应到文本的结果
+        if len(unmatched) == unmatched_before:
+            fresh.update(batch_items)
+
+    if cache is not None:
+        try:
+            if fresh:
+                save_cached_results(cache, fresh, scope)
+        except sqlite3.Error as e:
+            script.warning(f"写入检查结果缓存失败: {e}")
+        finally:
+            cache.close()
+
+    if errors and len(errors) == len(batch_results) and not results_by_text:
+        return {'error': errors[0], 'result': []}
+    if errors:
+        script.warning(f"{len(errors)}/{len(batch_results)} 批检查失败: {errors[0]}")
+
+    issues, checked_count = expand_results_to_entries(positions, results_by_text)
+    issues.extend(unmatched)
+
+    return {
+        'checked_count': checked_count,
+        'total_entries': len(items),
+        'failed_batches': len(errors),
+        'result': issues,
+        'model': used_model
+    }
+
+
+def iter_message_lines(ds_result: Dict[str, Any], stats: Dict[str, int]) -> Iterator[str]:
+    """逐行产出详细消息（包含所有issues和suggestions），同时把统计数累加到 stats"""
+    yield "文本质量检查结果："
+    yield ""
+
+    for idx, item in enumerate(ds_result.get('result', []), 1):
         if not isinstance(item, dict):
             continue
 
@@ -207,51 +555,57 @@ def format_detailed_message(script: ScriptBase, ds_result: Dict[str, Any]) -> st
         if not valid_issues and not valid_suggestions:
             continue
 
-        lines.append(f"【第{idx}条】 {original}")
+        yield f"【第{idx}条】 {original}"
 
         if valid_issues:
-            problem_count += len(valid_issues)
-            lines.append("问题：")
+            stats['texts_with_issues'] += 1
+            stats['total_issues'] += len(valid_issues)
+            yield "问题："
             for issue in valid_issues:
-                lines.append(f"  • {issue}")
+                yield f"  • {issue}"
 
         if valid_suggestions:
-            suggestion_count += len(valid_suggestions)
-            lines.append("建议：")
+            stats['total_suggestions'] += len(valid_suggestions)
+            yield "建议："
             for suggestion in valid_suggestions:
-                lines.append(f"  • {suggestion}")
+                yield f"  • {suggestion}"
 
-        lines.append("")
+        yield ""
 
     # 添加统计
     checked_count = ds_result.get('checked_count', 0)
-    lines.append(f"共检查 {checked_count} 条文本，发现 {problem_count} 个问题，给出 {suggestion_count} 条建议")
+    yield f"共检查 {checked_count} 条文本，发现 {stats['total_issues']} 个问题，给出 {stats['total_suggestions']} 条建议"
 
-    return "\n".join(lines)
 
+def summarize_results(script: ScriptBase, ds_result: Dict[str, Any]) -> Tuple[str, Dict[str, int]]:
+    """一次遍历检查结果，同时生成详细消息（包含所有issues和suggestions）和统计信息
 
-def validate_parameters(script: ScriptBase, directory: str, file_name: str) -> bool:
-    """验证输入参数"""
-    if not directory or not file_name:
-        return False
-    return os.path.exists(os.path.join(directory, file_name))
+    Returns:
+        (详细消息, 统计信息)
+    """
+    stats = {'texts_with_issues': 0, 'total_issues': 0, 'total_suggestions': 0}
 
+    if ds_result.get('error'):
+        return f"检查失败: {ds_result['error']}", stats
 
-def calculate_statistics(script: ScriptBase, issues_list: List[Dict[str, Any]]) -> Dict[str, int]:
-    """计算统计信息"""
-    stats = {'texts_with_issues': 0, 'total_issues': 0, 'total_suggestions': 0}
+    if not ds_result.get('result'):
+        return "文本检查完成，未发现任何问题", stats
 
-    for item in issues_list:
-        if isinstance(item, dict):
-            issues = [str(x).strip() for x in item.get('issues', []) if str(x).strip()]
-            suggestions = [str(x).strip() for x in item.get('suggestions', []) if str(x).strip()]
+    # 消息要放进返回结果，需要完整字符串；逐行写入 StringIO，不保留全部行的列表
+    buf = io.StringIO()
+    lines = iter_message_lines(ds_result, stats)
+    buf.write(next(lines))
+    for line in lines:
+        buf.write('\n')
+        buf.write(line)
+    return buf.getvalue(), stats
 
-            if issues:
-                stats['texts_with_issues'] += 1
-                stats['total_issues'] += len(issues)
-            stats['total_suggestions'] += len(suggestions)
 
-    return stats
+def validate_parameters(script: ScriptBase, directory: str, file_name: str) -> bool:
+    """验证输入参数"""
+    if not directory or not file_name:
+        return False
+    return os.path.exists(os.path.join(directory, file_name))
 
 
 # ==================== 主逻辑函数 ====================
@@ -298,15 +652,12 @@ def main_logic(script: ScriptBase) -> Dict[str, Any]:
         ds_result = deepseek_check(script, entries)
         duration = time.time() - start_time
 
-        # 6. 生成详细消息（包含所有issues和suggestions）
-        detailed_message = format_detailed_message(script, ds_result)
-
-        # 7. 统计信息
-        statistics = calculate_statistics(script, ds_result.get('result', []))
+        # 6. 生成详细消息（包含所有issues和suggestions）和统计信息
+        detailed_message, statistics = summarize_results(script, ds_result)
 
         script.info("检查完成")
 
-        # 8. 返回结果
+        # 7. 返回结果
         return script.success_result(
             message=detailed_message,  # 详细消息包含所有issues和suggestions
             data={
@@ -326,7 +677,7 @@ def main_logic(script: ScriptBase) -> Dict[str, Any]:
         )
 
     except Exception as e:
-        # 9. 错误处理
+        # 8. 错误处理
         script.error(f"执行失败: {e}")
         raise
 
@@ -8,7 +8,7 @@
 
 import re
 import os
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Pattern
 
 
 # ==================== 辅助函数区域 ====================
@@ -73,18 +73,27 @@ def detect_block_start(line: str, line_num: int) -> tuple:
     return None, None
 
 
-def is_parameter_in_line(param_name: str, line: str) -> bool:
-    """检查参数是否在行中（精确匹配）"""
-    patterns = [
-        rf'\b{re.escape(param_name)}\s*=',  # param=
-        rf'\b{re.escape(param_name)}\s*:',  # param:
-        rf'"{re.escape(param_name)}"\s*:',  # "param":
-    ]
+def compile_parameters_pattern(parameters: List[str]) -> Pattern:
+    """把参数编译成一个正则（精确匹配 param= / param: / "param":）
+
+    匹配到的参数名在 key 或 quoted 分组中，一次 finditer 即可找出所有参数。
+    finditer 只返回互不重叠的匹配，参数名含非单词字符时（如 item.id 和 id）
+    一个参数的匹配可能盖住另一个，这种情况由 compile_parameter_patterns 逐个参数编译
+    """
+    # 长的参数名排在前面，前缀相同的参数（如 id 和 id2）优先尝试较长的
+    alternatives = '|'.join(re.escape(p) for p in sorted(set(parameters), key=len, reverse=True))
+    return re.compile(rf'\b(?P<key>{alternatives})\s*[=:]|"(?P<quoted>{alternatives})"\s*:')
+
 
-    for pattern in patterns:
-        if re.search(pattern, line):
-            return True
-    return False
+def compile_parameter_patterns(parameters: List[str]) -> List[Pattern]:
+    """编译逐行检查参数用的正则列表
+
+    参数名都是单词字符时合并为一个正则，否则每个参数一个正则，避免匹配互相覆盖
+    """
+    unique_params = list(dict.fromkeys(parameters))
+    if all(re.fullmatch(r'\w+', p) for p in unique_params):
+        return [compile_parameters_pattern(unique_params)]
+    return [compile_parameters_pattern([p]) for p in unique_params]
 
 
 def load_config_file(script, file_path: str) -> tuple:
@@ -131,6 +140,10 @@ def check_missing_parameters(script, lines: List[str], parameters: List[str]) ->
     """检查配置块中缺失的参数"""
     script.info(f"开始检查缺失参数: {', '.join(parameters)}")
 
+    # 参数正则只编译一次；参数名都是单词字符时合并为一个正则，每行只匹配一遍
+    params_patterns = compile_parameter_patterns(parameters)
+    param_count = len(set(parameters))
+
     missing_blocks = []  # 缺失参数的配置块
     total_blocks = 0
     found_blocks = 0
@@ -169,9 +182,9 @@ def check_missing_parameters(script, lines: List[str], parameters: List[str]) ->
                 script.debug(f"发现配置块: {block_type} - {block_id} (第{total_blocks}个，行 {line_num})")
 
                 # 检查当前行是否包含目标参数
-                for param in parameters:
-                    if is_parameter_in_line(param, line_stripped):
-                        current_block_params.add(param)
+                for pattern in params_patterns:
+                    for m in pattern.finditer(line_stripped):
+                        current_block_params.add(m.group(m.lastgroup))
 
                 continue
 
@@ -180,9 +193,11 @@ def check_missing_parameters(script, lines: List[str], parameters: List[str]) ->
             brace_count += line_stripped.count('{') - line_stripped.count('}')
 
             # 检查当前行是否包含目标参数
-            for param in parameters:
-                if is_parameter_in_line(param, line_stripped):
-                    current_block_params.add(param)
+            # 当前块已找到全部参数时，剩余行只需统计大括号
+            if len(current_block_params) < param_count:
+                for pattern in params_patterns:
+                    for m in pattern.finditer(line_stripped):
+                        current_block_params.add(m.group(m.lastgroup))
 
             # 检查块是否结束
             if brace_count <= 0:
@@ -6,10 +6,18 @@
 """
 
 import os
-import chardet
-from typing import List, Tuple, Dict, Any
+import codecs
+import charset_normalizer
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple, Dict, Any, Optional
 from script_base import ScriptBase, create_simple_script
 
+# 编码检测只取文件开头的样本，统计型检测器在几十 KB 内即可收敛
+ENCODING_SAMPLE_SIZE = 64 * 1024
+
+# 编码检测结果缓存，键为 (路径, 修改时间, 文件大小)，文件变化后自动失效
+_ENCODING_CACHE: Dict[Tuple[str, float, int], str] = {}
+
 
 class FileContentSearcher:
     """文件内容搜索器"""
@@ -31,12 +39,35 @@ class FileContentSearcher:
         self.script.info("参数验证通过")
         return True
     
+    @staticmethod
+    def sniff_encoding(sample: bytes) -> Optional[str]:
+        """BOM 或合法 UTF-8（含纯ASCII）直接确定编码，无需统计检测；无法确定返回None"""
+        if sample.startswith(codecs.BOM_UTF8):
+            return 'utf-8-sig'
+        if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+            return 'utf-16'
+        try:
+            # final=False：样本末尾被截断的多字节字符不算解码失败
+            codecs.utf_8_decode(sample, 'strict', False)
+        except UnicodeDecodeError:
+            return None
+        return 'utf-8'
+    
     def get_encoding(self, file_path: str) -> str:
         """检测文件编码"""
         try:
-            with open(file_path, 'rb') as f:
-                result = chardet.detect(f.read())
-                return result['encoding'] or 'utf-8'
+            st = os.stat(file_path)
+            cache_key = (file_path, st.st_mtime, st.st_size)
+            encoding = _ENCODING_CACHE.get(cache_key)
+            if encoding is None:
+                with open(file_path, 'rb') as f:
+                    sample = f.read(ENCODING_SAMPLE_SIZE)
+                encoding = self.sniff_encoding(sample)
+                if encoding is None:
+                    result = charset_normalizer.detect(sample)
+                    encoding = result['encoding'] or 'utf-8'
+                _ENCODING_CACHE[cache_key] = encoding
+            return encoding
         except Exception as e:
             self.script.warning(f"无法检测文件编码 {file_path}: {e}")
             return 'utf-8'
@@ -118,9 +149,8 @@ class FileContentSearcher:
         self.script.info(f"开始在目录中搜索: {directory}")
         
         files = self.find_files(directory, file_formats, recursive)
-        results = []
-        
-        for file_path in files:
+
+        def search_one(file_path: str) -> Optional[Dict[str, Any]]:
             try:
                 content = self.read_file_with_chardet(file_path)
                 if content:
@@ -130,16 +160,24 @@ class FileContentSearcher:
                         file_ext = os.path.splitext(file_path)[1]
                         file_type = 'script' if file_ext in ['.cs', '.py', '.js', '.ts'] else 'config'
                         
-                        results.append({
+                        return {
                             'type': file_type,
                             'filename': os.path.basename(file_path),
                             'filepath': file_path,
                             'matches': matches
-                        })
+                        }
             except Exception as e:
                 self.script.warning(f"搜索文件失败 {file_path}: {e}")
+            return None
+
+        # 多个文件时用线程池并发读取（文件读取会释放GIL），map 保持结果与文件顺序一致
+        if len(files) > 1:
+            with ThreadPoolExecutor(max_workers=min(8, len(files))) as executor:
+                found = list(executor.map(search_one, files))
+        else:
+            found = [search_one(file_path) for file_path in files]
         
-        return results
+        return [r for r in found if r is not None]
     
     
     def get_project_paths(self) -> Dict[str, str]:
@@ -58,6 +58,8 @@ class ScriptBase:
         脚本参数，从环境变量SCRIPT_PARAMETERS解析JSON获取
     page_context : str
         页面上下文，从环境变量PAGE_CONTEXT获取，默认为'unknown'
+    debug_enabled : bool
+        是否输出调试日志，从环境变量SCRIPT_DEBUG获取，设为0/false/no时关闭，默认开启
     start_time : float
         脚本开始执行的时间戳，用于计算执行耗时
     
@@ -94,6 +96,8 @@ class ScriptBase:
             JSON格式的脚本参数
         PAGE_CONTEXT : str
             页面上下文信息，用于标识脚本来源页面
+        SCRIPT_DEBUG : str
+            调试日志开关，设为0/false/no时关闭debug输出
             
         示例：
         -----
@@ -112,6 +116,9 @@ class ScriptBase:
         # 获取页面上下文信息
         self.page_context = os.environ.get('PAGE_CONTEXT', 'unknown')
         
+        # 调试日志开关，热点循环中可先检查该属性再构造调试信息
+        self.debug_enabled = os.environ.get('SCRIPT_DEBUG', '1').strip().lower() not in ('0', 'false', 'no')
+        
         # 记录开始时间，用于计算执行耗时
         self.start_time = time.time()
         
@@ -186,7 +193,8 @@ class ScriptBase:
         输出调试信息
         
         输出调试级别的日志信息，用于开发调试阶段。
-        输出到stderr，避免与脚本结果输出混淆。
+        输出到stderr，避免与脚本结果输出混淆。debug_enabled为False时不输出。
+        热点循环中建议先检查debug_enabled，避免无谓地构造f-string。
         
         参数：
         -----
@@ -197,7 +205,12 @@ class ScriptBase:
         -----
         script.debug("开始处理文件列表")
         script.debug(f"找到 {len(files)} 个文件")
+        
+        if script.debug_enabled:
+            script.debug(f"处理第 {index} 项: {item}")
         """
+        if not self.debug_enabled:
+            return
         print(f"[DEBUG] {message}", file=sys.stderr)
     
     def info(self, message: str):
@@ -360,6 +373,8 @@ class ScriptBase:
         
         将结果字典格式化为JSON并输出到标准输出。
         使用ensure_ascii=True确保中文字符正确显示。
+        不使用缩进：json.dumps在indent为None时走C编码器，大结果集序列化明显更快；
+        输出仅供执行器json.loads解析，紧凑格式不影响结果。
         
         参数：
         -----
@@ -379,10 +394,10 @@ class ScriptBase:
         """
         try:
             # 输出JSON格式的结果，确保中文字符正确显示
-            print(json.dumps(result, ensure_ascii=True, indent=2))
+            print(json.dumps(result, ensure_ascii=True))
         except UnicodeEncodeError:
             # 如果编码失败，尝试使用默认编码
-            print(json.dumps(result, ensure_ascii=True, indent=2))
+            print(json.dumps(result, ensure_ascii=True))
     
     def run_with_error_handling(self, main_func):
         """
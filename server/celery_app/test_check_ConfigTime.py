@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+check_ConfigTime 读取文件编码的测试
+"""
+
+import os
+import tempfile
+import unittest
+
+import check_ConfigTime
+
+
+class _SilentScript:
+    """只提供 read_file_with_encoding 用到的日志方法"""
+
+    def debug(self, message):
+        pass
+
+    def info(self, message):
+        pass
+
+    def warning(self, message):
+        pass
+
+    def error(self, message):
+        pass
+
+
+class ReadFileWithEncodingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.script = _SilentScript()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        check_ConfigTime._LAST_SUCCESS_ENCODING.clear()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+        check_ConfigTime._LAST_SUCCESS_ENCODING.clear()
+
+    def write_file(self, name: str, data: bytes) -> str:
+        path = os.path.join(self.tmp_dir.name, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def read(self, path: str):
+        return check_ConfigTime.read_file_with_encoding(self.script, path, 'UTF-16')
+
+    def test_utf8_file_after_gbk_file_in_same_directory(self):
+        text = 'name="春节活动";\n'
+        gbk_path = self.write_file('a.data', text.encode('gbk'))
+        utf8_path = self.write_file('b.data', text.encode('utf-8'))
+
+        self.assertEqual(self.read(gbk_path), (text, 'gbk'))
+        self.assertEqual(self.read(utf8_path), (text, 'utf-8'))
+
+    def test_gbk_file_after_utf8_file_in_same_directory(self):
+        text = 'name="春节活动";\n'
+        utf8_path = self.write_file('a.data', text.encode('utf-8'))
+        gbk_path = self.write_file('b.data', text.encode('gbk'))
+
+        self.assertEqual(self.read(utf8_path), (text, 'utf-8'))
+        self.assertEqual(self.read(gbk_path), (text, 'gbk'))
+
+
+if __name__ == '__main__':
+    unittest.main()